@@ -31,6 +31,10 @@ def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
 
+    # Serialización JSON acelerada (orjson) si está instalado
+    from app.utils.json_provider import init_json_provider
+    init_json_provider(app)
+
     # ===== VERIFICACIÓN DE ELIMINACIÓN DE FONDO =====
     # Esta verificación debe hacerse ANTES de inicializar extensiones que puedan depender de ella
     app.config['REMOVE_BG_AVAILABLE'] = False
@@ -71,6 +75,10 @@ def create_app(config_name='development'):
     login_manager.init_app(app)
     bcrypt.init_app(app)
 
+    # Monitor de consultas por petición (detección de N+1)
+    from app.utils.query_monitor import init_query_monitor
+    init_query_monitor(app)
+
     # Configurar Flask-Login
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Por favor inicia sesión para acceder a esta página.'
@@ -509,9 +517,37 @@ def register_cli_commands(app):
     @app.cli.command('inventory-stats')
     def inventory_stats():
         """Muestra estadísticas del inventario"""
-        laptops = Laptop.query.all()
+        # Recorrido en streaming de tuplas de columnas (sin hidratar objetos ORM
+        # ni llenar el identity map): memoria constante aunque crezca el inventario
+        rows = db.session.query(
+            Laptop.quantity,
+            Laptop.sale_price,
+            Laptop.purchase_cost,
+            Laptop.is_published,
+            Laptop.is_featured,
+            Laptop.category,
+            Brand.name.label('brand_name')
+        ).outerjoin(Brand, Laptop.brand_id == Brand.id).yield_per(1000)
+
+        skus = total_units = published = featured = 0
+        total_value = total_cost = 0.0
+        categories_stats = {'laptop': 0, 'workstation': 0, 'gaming': 0}
+        brands_stats = {}
 
-        if not laptops:
+        # Una sola pasada acumulando todas las métricas
+        for row in rows:
+            skus += 1
+            total_units += row.quantity
+            total_value += float(row.sale_price * row.quantity)
+            total_cost += float(row.purchase_cost * row.quantity)
+            published += 1 if row.is_published else 0
+            featured += 1 if row.is_featured else 0
+            if row.category in categories_stats:
+                categories_stats[row.category] += 1
+            name = row.brand_name or 'N/A'
+            brands_stats[name] = brands_stats.get(name, 0) + row.quantity
+
+        if not skus:
             click.echo("🔭 No hay laptops")
             return
 
@@ -519,31 +555,22 @@ def register_cli_commands(app):
         click.echo("📊 ESTADÍSTICAS DEL INVENTARIO")
         click.echo("=" * 50)
 
-        total_units = sum(l.quantity for l in laptops)
-        total_value = sum(float(l.sale_price * l.quantity) for l in laptops)
-        total_cost = sum(float(l.purchase_cost * l.quantity) for l in laptops)
-
         click.echo(f"\n💰 FINANCIERO")
         click.echo(f"   Valor de venta: ${total_value:,.2f}")
         click.echo(f"   Costo total: ${total_cost:,.2f}")
         click.echo(f"   Ganancia potencial: ${total_value - total_cost:,.2f}")
 
         click.echo(f"\n📦 INVENTARIO")
-        click.echo(f"   SKUs: {len(laptops)}")
+        click.echo(f"   SKUs: {skus}")
         click.echo(f"   Unidades: {total_units}")
-        click.echo(f"   Publicadas: {len([l for l in laptops if l.is_published])}")
-        click.echo(f"   Destacadas: {len([l for l in laptops if l.is_featured])}")
+        click.echo(f"   Publicadas: {published}")
+        click.echo(f"   Destacadas: {featured}")
 
         click.echo(f"\n🏷️ POR CATEGORÍA")
-        for cat in ['laptop', 'workstation', 'gaming']:
-            count = len([l for l in laptops if l.category == cat])
+        for cat, count in categories_stats.items():
             click.echo(f"   {cat.capitalize()}: {count}")
 
         click.echo(f"\n🏭 POR MARCA")
-        brands_stats = {}
-        for l in laptops:
-            name = l.brand.name if l.brand else 'N/A'
-            brands_stats[name] = brands_stats.get(name, 0) + l.quantity
         for name, qty in sorted(brands_stats.items(), key=lambda x: -x[1]):
             click.echo(f"   {name}: {qty} unidades")
 
@@ -19,6 +19,7 @@ from app.models.laptop import (
     Brand, LaptopModel, Processor, OperatingSystem,
     Screen, GraphicsCard, Storage, Ram, Store, Location, Supplier
 )
+from app.services.catalog_service import CatalogService
 
 # ===== OPCIONES DE PUERTOS DE CONECTIVIDAD =====
 CONNECTIVITY_PORTS_CHOICES = [
@@ -148,30 +149,12 @@ class FilterForm(FlaskForm):
         """Inicializa el formulario y carga las opciones de los selectores"""
         super(FilterForm, self).__init__(*args, **kwargs)
 
-        # Stores
-        self.store_id.choices = [(0, 'Todas las tiendas')] + [
-            (s.id, s.name) for s in Store.query.filter_by(is_active=True).order_by(Store.name).all()
-        ]
-
-        # Brands
-        self.brand_id.choices = [(0, 'Todas las marcas')] + [
-            (b.id, b.name) for b in Brand.query.filter_by(is_active=True).order_by(Brand.name).all()
-        ]
-
-        # Processors
-        self.processor_id.choices = [(0, 'Todos los procesadores')] + [
-            (p.id, p.name) for p in Processor.query.filter_by(is_active=True).order_by(Processor.name).all()
-        ]
-
-        # Graphics Cards
-        self.graphics_card_id.choices = [(0, 'Todas las GPUs')] + [
-            (g.id, g.name) for g in GraphicsCard.query.filter_by(is_active=True).order_by(GraphicsCard.name).all()
-        ]
-
-        # Screens
-        self.screen_id.choices = [(0, 'Todas las pantallas')] + [
-            (s.id, s.name) for s in Screen.query.filter_by(is_active=True).order_by(Screen.name).all()
-        ]
+        # Opciones desde la caché de catálogos (sin consultas en cada render)
+        self.store_id.choices = [(0, 'Todas las tiendas')] + CatalogService.get_active_choices(Store)
+        self.brand_id.choices = [(0, 'Todas las marcas')] + CatalogService.get_active_choices(Brand)
+        self.processor_id.choices = [(0, 'Todos los procesadores')] + CatalogService.get_active_choices(Processor)
+        self.graphics_card_id.choices = [(0, 'Todas las GPUs')] + CatalogService.get_active_choices(GraphicsCard)
+        self.screen_id.choices = [(0, 'Todas las pantallas')] + CatalogService.get_active_choices(Screen)
 
 
 # ===== FORMULARIO PRINCIPAL DE LAPTOP =====
@@ -1,7 +1,8 @@
 from app import db
-from datetime import datetime, date
+from datetime import date
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import func
+from sqlalchemy import func, and_, case
+from app.models.mixins import utcnow, naive_utcnow
 
 
 class Expense(db.Model):
@@ -20,8 +21,12 @@ class Expense(db.Model):
     auto_renew = db.Column(db.Boolean, default=False)
     notes = db.Column(db.Text)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
+    updated_at = db.Column(
+        db.DateTime,
+        default=naive_utcnow,
+        onupdate=utcnow()  # Lo calcula la base de datos, también en updates masivos
+    )
 
     # Relaciones
     category_ref = db.relationship('ExpenseCategory', backref='expenses', lazy='joined')
@@ -33,6 +38,11 @@ class Expense(db.Model):
             return False
         return self.due_date < date.today()
 
+    @is_overdue.expression
+    def is_overdue(cls):
+        # Versión SQL: permite filtrar/ordenar sin recorrer objetos en Python
+        return and_(cls.is_paid == False, cls.due_date < func.current_date())
+
     @hybrid_property
     def days_until(self):
         if self.is_paid:
@@ -40,6 +50,14 @@ class Expense(db.Model):
         delta = self.due_date - date.today()
         return delta.days
 
+    @days_until.expression
+    def days_until(cls):
+        # En PostgreSQL date - date devuelve directamente un entero de días
+        return case(
+            (cls.is_paid == True, 0),
+            else_=cls.due_date - func.current_date()
+        )
+
     @hybrid_property
     def next_due_date(self):
         if not self.is_recurring or not self.due_date:
@@ -107,7 +125,7 @@ class ExpenseCategory(db.Model):
     name = db.Column(db.String(100), nullable=False, unique=True)
     color = db.Column(db.String(50))  # Para UI styling
     description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
 
     def __repr__(self):
         return f'<ExpenseCategory {self.id}: {self.name}>'
@@ -6,6 +6,8 @@
 from app import db
 from app.models.mixins import TimestampMixin, CatalogMixin
 from datetime import datetime, date
+from sqlalchemy import func, case
+from sqlalchemy.ext.hybrid import hybrid_property
 
 
 # ===== MODELOS DE CATÁLOGO (usan CatalogMixin) =====
@@ -18,7 +20,7 @@ class Brand(CatalogMixin, db.Model):
     __tablename__ = 'brands'
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='brand', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='brand', lazy='dynamic')
 
 
 class LaptopModel(CatalogMixin, db.Model):
@@ -31,7 +33,7 @@ class LaptopModel(CatalogMixin, db.Model):
     brand_id = db.Column(db.Integer, db.ForeignKey('brands.id'), nullable=True)
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='model', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='model', lazy='dynamic')
 
 
 class Processor(CatalogMixin, db.Model):
@@ -41,7 +43,7 @@ class Processor(CatalogMixin, db.Model):
     __tablename__ = 'processors'
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='processor', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='processor', lazy='dynamic')
 
 
 class OperatingSystem(CatalogMixin, db.Model):
@@ -51,7 +53,7 @@ class OperatingSystem(CatalogMixin, db.Model):
     __tablename__ = 'operating_systems'
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='operating_system', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='operating_system', lazy='dynamic')
 
 
 class Screen(CatalogMixin, db.Model):
@@ -61,7 +63,7 @@ class Screen(CatalogMixin, db.Model):
     __tablename__ = 'screens'
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='screen', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='screen', lazy='dynamic')
 
 
 class GraphicsCard(CatalogMixin, db.Model):
@@ -71,7 +73,7 @@ class GraphicsCard(CatalogMixin, db.Model):
     __tablename__ = 'graphics_cards'
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='graphics_card', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='graphics_card', lazy='dynamic')
 
 
 class Storage(CatalogMixin, db.Model):
@@ -81,7 +83,7 @@ class Storage(CatalogMixin, db.Model):
     __tablename__ = 'storage'
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='storage', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='storage', lazy='dynamic')
 
 
 class Ram(CatalogMixin, db.Model):
@@ -91,7 +93,7 @@ class Ram(CatalogMixin, db.Model):
     __tablename__ = 'ram'
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='ram', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='ram', lazy='dynamic')
 
 
 class Store(CatalogMixin, db.Model):
@@ -105,8 +107,8 @@ class Store(CatalogMixin, db.Model):
     phone = db.Column(db.String(20))
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='store', lazy='dynamic')
-    locations = db.relationship('Location', backref='store_ref', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='store', lazy='dynamic')
+    locations = db.relationship('Location', back_populates='store_ref', lazy='dynamic')
 
 
 class Location(CatalogMixin, db.Model):
@@ -119,7 +121,8 @@ class Location(CatalogMixin, db.Model):
     store_id = db.Column(db.Integer, db.ForeignKey('stores.id'), nullable=True)
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='location', lazy='dynamic')
+    store_ref = db.relationship('Store', back_populates='locations')
+    laptops = db.relationship('Laptop', back_populates='location', lazy='dynamic')
 
 
 class Supplier(CatalogMixin, db.Model):
@@ -137,7 +140,7 @@ class Supplier(CatalogMixin, db.Model):
     notes = db.Column(db.Text)
 
     # Relaciones
-    laptops = db.relationship('Laptop', backref='supplier', lazy='dynamic')
+    laptops = db.relationship('Laptop', back_populates='supplier', lazy='dynamic')
 
 
 # ===== MODELO PRINCIPAL: LAPTOP =====
@@ -206,19 +209,40 @@ class Laptop(TimestampMixin, db.Model):
     min_alert = db.Column(db.Integer, default=1, nullable=False)
 
     # ===== 8. TIMESTAMPS =====
-    entry_date = db.Column(db.Date, default=date.today, nullable=False, index=True)
+    entry_date = db.Column(db.Date, default=date.today, nullable=False)  # Índice: idx_laptop_entry_date_id
     sale_date = db.Column(db.Date, nullable=True)
     internal_notes = db.Column(db.Text, nullable=True)
     # created_at y updated_at vienen de TimestampMixin
 
     # ===== RELACIÓN CON USUARIO CREADOR =====
-    created_by = db.relationship('User', backref='laptops_created', foreign_keys=[created_by_id])
+    created_by = db.relationship('User', back_populates='laptops_created', foreign_keys=[created_by_id])
+
+    # ===== RELACIONES CON CATÁLOGOS (muchos-a-uno) =====
+    # Declaradas explícitamente (back_populates) para que la estrategia de carga sea
+    # visible aquí. 'select' por defecto; cada consulta elige selectinload/joinedload.
+    brand = db.relationship('Brand', back_populates='laptops', lazy='select')
+    model = db.relationship('LaptopModel', back_populates='laptops', lazy='select')
+    processor = db.relationship('Processor', back_populates='laptops', lazy='select')
+    operating_system = db.relationship('OperatingSystem', back_populates='laptops', lazy='select')
+    screen = db.relationship('Screen', back_populates='laptops', lazy='select')
+    graphics_card = db.relationship('GraphicsCard', back_populates='laptops', lazy='select')
+    storage = db.relationship('Storage', back_populates='laptops', lazy='select')
+    ram = db.relationship('Ram', back_populates='laptops', lazy='select')
+    store = db.relationship('Store', back_populates='laptops', lazy='select')
+    location = db.relationship('Location', back_populates='laptops', lazy='select')
+    supplier = db.relationship('Supplier', back_populates='laptops', lazy='select')
+
+    # Imágenes (se eliminan junto con la laptop; las filas las borra el ON DELETE CASCADE)
+    images = db.relationship(
+        'LaptopImage', back_populates='laptop', lazy='select', cascade='all, delete-orphan',
+        passive_deletes=True
+    )
 
     # ===== PROPIEDADES CALCULADAS =====
 
-    @property
+    @hybrid_property
     def available_quantity(self):
-        """Cantidad disponible (total - reservada)"""
+        """Cantidad disponible (total - reservada); también usable en consultas"""
         return self.quantity - self.reserved_quantity
 
     @property
@@ -245,11 +269,37 @@ class Laptop(TimestampMixin, db.Model):
         """Precio con impuesto incluido"""
         return float(self.effective_price) * (1 + float(self.tax_percent) / 100)
 
-    @property
+    @hybrid_property
     def is_low_stock(self):
-        """Indica si el stock está bajo el mínimo de alerta"""
+        """Indica si el stock está bajo el mínimo de alerta; también usable en consultas"""
         return self.available_quantity <= self.min_alert
 
+    @hybrid_property
+    def days_in_inventory(self):
+        """Días en inventario (hasta la venta o hasta hoy); se calcula al leer, no se guarda"""
+        from app.services.inventory_service import InventoryService
+        return InventoryService.calculate_days_in_inventory(self.entry_date, self.sale_date)
+
+    @days_in_inventory.expression
+    def days_in_inventory(cls):
+        # En PostgreSQL date - date devuelve un entero de días
+        return func.coalesce(cls.sale_date, func.current_date()) - cls.entry_date
+
+    @hybrid_property
+    def rotation_status(self):
+        """Estado de rotación: 'fast', 'medium' o 'slow'"""
+        from app.services.inventory_service import InventoryService
+        return InventoryService.determine_rotation_status(self.days_in_inventory)
+
+    @rotation_status.expression
+    def rotation_status(cls):
+        days = cls.days_in_inventory
+        return case(
+            (days <= 30, 'fast'),
+            (days <= 60, 'medium'),
+            else_='slow'
+        )
+
     # ===== MÉTODOS DE SERIALIZACIÓN =====
 
     def to_dict(self, include_relationships=True):
@@ -354,8 +404,46 @@ class Laptop(TimestampMixin, db.Model):
     __table_args__ = (
         db.Index('idx_laptop_brand_category', 'brand_id', 'category'),
         db.Index('idx_laptop_published_featured', 'is_published', 'is_featured'),
-        db.Index('idx_laptop_entry_date', 'entry_date'),
+        db.Index('idx_laptop_entry_date_id', 'entry_date', 'id'),  # Paginación por cursor
+        db.Index(
+            'idx_laptop_list', 'store_id', 'brand_id', 'category', 'entry_date',
+            postgresql_include=['sale_price', 'quantity', 'sku', 'condition', 'min_alert']
+        ),
+        db.Index('idx_laptop_sale_price', 'sale_price'),
+        # Facetas del listado + orden por cursor (entry_date, id)
+        db.Index('idx_laptop_store_entry', 'store_id', 'entry_date', 'id'),
+        db.Index('idx_laptop_brand_entry', 'brand_id', 'entry_date', 'id'),
+        db.Index('idx_laptop_processor_entry', 'processor_id', 'entry_date', 'id'),
+        db.Index('idx_laptop_gpu_entry', 'graphics_card_id', 'entry_date', 'id'),
+        db.Index('idx_laptop_screen_entry', 'screen_id', 'entry_date', 'id'),
+        db.Index('idx_laptop_supplier_entry', 'supplier_id', 'entry_date', 'id'),
+        db.Index(
+            'idx_laptop_published_entry', 'entry_date', 'id',
+            postgresql_where=db.text('is_published')
+        ),
         db.Index('idx_laptop_store_location', 'store_id', 'location_id'),
+        # Predicado idéntico al de Laptop.is_low_stock para que el planner lo use
+        db.Index(
+            'idx_laptop_low_stock', 'id',
+            postgresql_where=db.text('quantity - reserved_quantity <= min_alert')
+        ),
+        # Búsqueda ILIKE '%texto%' del listado (pg_trgm)
+        db.Index(
+            'idx_laptop_sku_trgm', 'sku',
+            postgresql_using='gin', postgresql_ops={'sku': 'gin_trgm_ops'}
+        ),
+        db.Index(
+            'idx_laptop_display_name_trgm', 'display_name',
+            postgresql_using='gin', postgresql_ops={'display_name': 'gin_trgm_ops'}
+        ),
+        db.Index(
+            'idx_laptop_slug_trgm', 'slug',
+            postgresql_using='gin', postgresql_ops={'slug': 'gin_trgm_ops'}
+        ),
+        db.Index(
+            'idx_laptop_short_description_trgm', 'short_description',
+            postgresql_using='gin', postgresql_ops={'short_description': 'gin_trgm_ops'}
+        ),
     )
 
 
@@ -376,7 +464,7 @@ class LaptopImage(TimestampMixin, db.Model):
     ordering = db.Column(db.Integer, default=0, nullable=False)
 
     # Relación - CAMBIADO: de lazy='dynamic' a lazy='select' para permitir eager loading
-    laptop = db.relationship('Laptop', backref=db.backref('images', lazy='select', cascade='all, delete-orphan'))
+    laptop = db.relationship('Laptop', back_populates='images')
 
     def to_dict(self):
         """Serializa la imagen a diccionario"""
@@ -396,4 +484,7 @@ class LaptopImage(TimestampMixin, db.Model):
 
     __table_args__ = (
         db.Index('idx_laptop_image_laptop_cover', 'laptop_id', 'is_cover'),
+        db.Index('idx_laptop_image_laptop_ordering', 'laptop_id', 'ordering'),
+        # Una sola portada por laptop: restricción EXCLUDE ux_laptop_image_cover,
+        # solo en la migración b4d9f3a7c2e8 (es específica de PostgreSQL)
     )
\ No newline at end of file
@@ -3,17 +3,64 @@
 # ============================================
 # Estos mixins se pueden usar en cualquier modelo
 
-from datetime import datetime
+from datetime import datetime, timezone
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import DateTime
 from app import db
 
 
+def naive_utcnow():
+    """
+    Hora actual en UTC sin tzinfo, para columnas DateTime sin zona
+
+    Sustituye a datetime.utcnow (obsoleto desde Python 3.12): se calcula con
+    datetime.now(timezone.utc) y se quita la zona para no cambiar lo que
+    se guarda en columnas 'timestamp without time zone'.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class utcnow(FunctionElement):
+    """
+    Hora actual en UTC (sin zona) calculada por la base de datos
+
+    PostgreSQL: timezone('utc', now()). SQLite (TestingConfig) y el resto de
+    dialectos usan su hora actual, que ya está en UTC.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return 'CURRENT_TIMESTAMP'
+
+
+@compiles(utcnow, 'sqlite')
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP en SQLite solo tiene segundos; %f conserva milisegundos
+    return "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow, 'postgresql')
+def _utcnow_postgresql(element, compiler, **kw):
+    return "timezone('utc', now())"
+
+
 class TimestampMixin:
     """
     Agrega campos de timestamp a cualquier modelo
     Uso: class MyModel(TimestampMixin, db.Model)
     """
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=naive_utcnow, nullable=False)
+    # onupdate en SQL: lo calcula la base de datos (en UTC) dentro del propio UPDATE,
+    # también en updates masivos (query.update / update()) que no pasan por Python
+    updated_at = db.Column(
+        db.DateTime,
+        default=naive_utcnow,
+        onupdate=utcnow()
+    )
 
 
 class SoftDeleteMixin:
@@ -27,7 +74,7 @@ class SoftDeleteMixin:
     def soft_delete(self):
         """Marca el registro como eliminado"""
         self.is_deleted = True
-        self.deleted_at = datetime.utcnow()
+        self.deleted_at = naive_utcnow()
 
     def restore(self):
         """Restaura un registro eliminado"""
@@ -4,9 +4,9 @@
 # Define la estructura de la tabla 'user' en PostgreSQL
 # Maneja toda la lógica relacionada con usuarios
 
-from datetime import datetime
 from flask_login import UserMixin
 from app import db, bcrypt
+from app.models.mixins import naive_utcnow
 
 
 # ============================================
@@ -76,16 +76,16 @@ class User(UserMixin, db.Model):
     # Útil para dar permisos especiales
 
     # Fecha de creación
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=naive_utcnow, nullable=False)
     # db.DateTime: Fecha y hora
-    # default=datetime.utcnow: Automáticamente guarda la fecha/hora de creación
-    # utcnow (sin paréntesis) pasa la función, no la ejecuta
+    # default=naive_utcnow: Automáticamente guarda la fecha/hora de creación (UTC)
+    # naive_utcnow (sin paréntesis) pasa la función, no la ejecuta
     # nullable=False: Siempre debe tener fecha de creación
 
     # Última actualización
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    # default=datetime.utcnow: Fecha/hora de creación
-    # onupdate=datetime.utcnow: Se actualiza automáticamente cada vez que modificas el usuario
+    updated_at = db.Column(db.DateTime, default=naive_utcnow, onupdate=naive_utcnow, nullable=False)
+    # default=naive_utcnow: Fecha/hora de creación
+    # onupdate=naive_utcnow: Se actualiza automáticamente cada vez que modificas el usuario
 
     # Último login
     last_login = db.Column(db.DateTime, nullable=True)
@@ -104,6 +104,17 @@ class User(UserMixin, db.Model):
     # Si el usuario falla muchos logins, bloqueamos temporalmente
     # nullable=True: Solo tiene valor si está bloqueado
 
+    # ===== RELACIONES =====
+
+    # Laptops registradas por este usuario (lado inverso de Laptop.created_by)
+    laptops_created = db.relationship(
+        'Laptop',
+        back_populates='created_by',
+        foreign_keys='Laptop.created_by_id',
+        lazy='dynamic'
+    )
+    # lazy='dynamic': devuelve una query, no carga las laptops hasta pedirlas
+
     # ===== MÉTODOS DE LA CLASE =====
 
     def __repr__(self):
@@ -190,7 +201,7 @@ class User(UserMixin, db.Model):
         lockout_time = Config.LOGIN_LOCKOUT_TIME  # 15 minutos
 
         if self.failed_login_attempts >= max_attempts:
-            self.locked_until = datetime.utcnow() + timedelta(minutes=lockout_time)
+            self.locked_until = naive_utcnow() + timedelta(minutes=lockout_time)
 
         db.session.commit()
 
@@ -222,7 +233,7 @@ class User(UserMixin, db.Model):
             return False
 
         # Si la fecha de bloqueo ya pasó, desbloquear
-        if datetime.utcnow() > self.locked_until:
+        if naive_utcnow() > self.locked_until:
             self.reset_failed_login()
             return False
 
@@ -235,7 +246,7 @@ class User(UserMixin, db.Model):
         ¿Cuándo usar?
         - Inmediatamente después de un login exitoso
         """
-        self.last_login = datetime.utcnow()
+        self.last_login = naive_utcnow()
         db.session.commit()
 
     def to_dict(self):
@@ -349,4 +360,4 @@ def receive_before_update(mapper, connection, target):
         connection: Conexión a la DB
         target: El objeto User que se está actualizando
     """
-    target.updated_at = datetime.utcnow()
\ No newline at end of file
+    target.updated_at = naive_utcnow()
\ No newline at end of file
@@ -87,13 +87,11 @@ def index():
     # Total de laptops
     total_laptops = Laptop.query.count()
     total_available = db.session.query(
-        func.sum(Laptop.quantity - Laptop.reserved_quantity)
+        func.sum(Laptop.available_quantity)
     ).scalar() or 0
     
     # Laptops con stock bajo
-    low_stock_count = Laptop.query.filter(
-        Laptop.quantity - Laptop.reserved_quantity <= Laptop.min_alert
-    ).count()
+    low_stock_count = Laptop.query.filter(Laptop.is_low_stock).count()
     
     # Valor total del inventario (basado en precio de venta)
     inventory_value = db.session.query(
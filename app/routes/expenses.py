@@ -3,15 +3,84 @@ from flask_login import login_required, current_user
 from app import db
 from app.models.expense import Expense, ExpenseCategory
 from app.models.user import User
+from app.utils.expense_dashboard import get_month_range, get_user_month_totals
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, and_, or_, extract
+from sqlalchemy import func, and_, or_, text, select, case, bindparam
+from sqlalchemy.orm import load_only, lazyload
 import csv
 import io
 import json
+import time
 
 bp = Blueprint('expenses', __name__, url_prefix='/expenses')
 
 
+# ============================================
+# CACHÉ DE CATEGORÍAS (TABLA PEQUEÑA Y CASI ESTÁTICA)
+# ============================================
+
+CATEGORY_CACHE_TTL = 60  # segundos
+_CAT_CACHE = {'t': 0, 'd': {}}
+
+
+def categories_dict():
+    """Devuelve {id: (name, color)} de las categorías, refrescado cada CATEGORY_CACHE_TTL"""
+    if time.time() - _CAT_CACHE['t'] > CATEGORY_CACHE_TTL:
+        rows = db.session.query(
+            ExpenseCategory.id, ExpenseCategory.name, ExpenseCategory.color
+        ).all()
+        _CAT_CACHE['d'] = {row.id: (row.name, row.color) for row in rows}
+        _CAT_CACHE['t'] = time.time()
+    return _CAT_CACHE['d']
+
+
+def invalidate_categories_cache():
+    """Fuerza la recarga de categorías en la próxima lectura"""
+    _CAT_CACHE['t'] = 0
+
+
+# Serie diaria contigua del mes: generate_series rellena los días sin gastos
+DAILY_EXPENSES_SQL = text("""
+    SELECT CAST(EXTRACT(DAY FROM d) AS INTEGER) AS day,
+           COALESCE(SUM(e.amount), 0) AS total,
+           COUNT(e.id) AS count
+    FROM generate_series(CAST(:som AS DATE), CAST(:eom AS DATE), INTERVAL '1 day') AS d
+    LEFT JOIN expenses e
+           ON e.due_date = CAST(d AS DATE)
+          AND e.created_by = :uid
+          AND e.is_paid = TRUE
+    GROUP BY d
+    ORDER BY d
+""")
+
+
+def _sum_when(*conditions):
+    """SUM(amount) condicionado, con 0 cuando no hay filas"""
+    return func.coalesce(func.sum(case((and_(*conditions), Expense.amount), else_=0)), 0)
+
+
+# Resumen de tarjetas: sentencia construida una sola vez al importar el módulo.
+# Solo cambian los parámetros, así SQLAlchemy reutiliza la forma compilada.
+_in_month = Expense.due_date.between(bindparam('som'), bindparam('eom'))
+
+EXPENSES_SUMMARY_STMT = select(
+    _sum_when(Expense.is_paid == False, _in_month).label('pending_month'),
+    _sum_when(Expense.is_paid == False, Expense.due_date < bindparam('today')).label('overdue_total'),
+    _sum_when(Expense.is_recurring == False, _in_month).label('fixed_total'),
+    _sum_when(Expense.is_recurring == True, _in_month).label('recurring_total'),
+    _sum_when(
+        Expense.is_paid == False,
+        Expense.due_date.between(bindparam('today'), bindparam('next_week'))
+    ).label('upcoming_total')
+).where(
+    Expense.created_by == bindparam('uid'),
+    or_(
+        _in_month,
+        and_(Expense.is_paid == False, Expense.due_date <= bindparam('next_week'))
+    )
+)
+
+
 # ============================================
 # RUTAS PRINCIPALES (IMPLEMENTAR EXISTENTES)
 # ============================================
@@ -233,8 +302,7 @@ def expense_update(expense_id):
         if 'notes' in data:
             expense.notes = data['notes']
 
-        expense.updated_at = datetime.utcnow()
-
+        # updated_at lo fija la BD en el UPDATE (onupdate del modelo)
         db.session.commit()
 
         return jsonify({
@@ -327,22 +395,43 @@ def expense_bulk_action():
     """API para acciones en lote"""
     data = request.get_json()
     action = data.get('action')
-    expense_ids = data.get('expense_ids', [])
+    # IDs como enteros y sin repetir: el IN no castea por fila y el conteo
+    # de permisos compara contra el número real de gastos distintos
+    try:
+        expense_ids = list({int(expense_id) for expense_id in data.get('expense_ids', [])})
+    except (TypeError, ValueError):
+        return jsonify({'error': 'IDs de gastos inválidos'}), 400
 
     if not expense_ids:
         return jsonify({'error': 'No hay gastos seleccionados'}), 400
 
-    # Verificar permisos para todos los gastos
-    expenses = Expense.query.filter(
+    # Verificar permisos para todos los gastos (solo conteo, sin cargar filas)
+    owned_count = db.session.query(func.count(Expense.id)).filter(
         Expense.id.in_(expense_ids),
         Expense.created_by == current_user.id
-    ).all()
+    ).scalar()
 
-    if len(expenses) != len(expense_ids):
+    if owned_count != len(expense_ids):
         return jsonify({'error': 'No tienes permiso para algunos gastos'}), 403
 
+    owned_filter = and_(
+        Expense.id.in_(expense_ids),
+        Expense.created_by == current_user.id
+    )
+
     try:
         if action == 'mark_paid':
+            # Solo se cargan las columnas necesarias para renovar recurrentes
+            expenses = Expense.query.filter(owned_filter).options(
+                load_only(
+                    Expense.id, Expense.description, Expense.amount, Expense.category_id,
+                    Expense.due_date, Expense.is_paid, Expense.is_recurring,
+                    Expense.frequency, Expense.advance_days, Expense.auto_renew, Expense.notes
+                ),
+                lazyload(Expense.category_ref),
+                lazyload(Expense.creator)
+            ).all()
+
             for expense in expenses:
                 expense.is_paid = True
                 expense.paid_date = date.today()
@@ -365,20 +454,20 @@ def expense_bulk_action():
                     db.session.add(new_expense)
 
         elif action == 'delete':
-            for expense in expenses:
-                db.session.delete(expense)
+            Expense.query.filter(owned_filter).delete(synchronize_session=False)
 
         elif action == 'mark_pending':
-            for expense in expenses:
-                expense.is_paid = False
-                expense.paid_date = None
+            Expense.query.filter(owned_filter).update(
+                {'is_paid': False, 'paid_date': None},
+                synchronize_session=False
+            )
 
         db.session.commit()
 
         return jsonify({
             'success': True,
-            'message': f'{len(expenses)} gastos procesados',
-            'processed': len(expenses)
+            'message': f'{owned_count} gastos procesados',
+            'processed': owned_count
         })
 
     except Exception as e:
@@ -429,6 +518,7 @@ def category_create_api():
 
         db.session.add(category)
         db.session.commit()
+        invalidate_categories_cache()
 
         return jsonify({
             'success': True,
@@ -446,35 +536,18 @@ def category_create_api():
 def dashboard_data():
     """API para datos del dashboard con gráficos"""
 
-    # Fechas para cálculos
-    today = date.today()
-    start_of_month = today.replace(day=1)
-    end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-    start_of_year = today.replace(month=1, day=1)
+    # Fechas para cálculos (memoizadas por petición)
+    month = get_month_range()
+    start_of_month = month['start_of_month']
+    end_of_month = month['end_of_month']
+    start_of_year = month['start_of_year']
 
     # 1. Gastos por día del mes actual (para gráfico de líneas)
-    daily_expenses = db.session.query(
-        extract('day', Expense.due_date).label('day'),
-        func.sum(Expense.amount).label('total'),
-        func.count(Expense.id).label('count')
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.due_date >= start_of_month,
-        Expense.due_date <= end_of_month,
-        Expense.is_paid == True
-    ).group_by(
-        extract('day', Expense.due_date)
-    ).order_by('day').all()
-
-    # Preparar datos para gráfico
-    days_in_month = [i for i in range(1, 32)]
-    daily_data = {day: {'total': 0, 'count': 0} for day in days_in_month}
-
-    for expense in daily_expenses:
-        daily_data[int(expense.day)] = {
-            'total': float(expense.total) if expense.total else 0,
-            'count': expense.count or 0
-        }
+    daily_expenses = db.session.execute(DAILY_EXPENSES_SQL, {
+        'som': start_of_month,
+        'eom': end_of_month,
+        'uid': current_user.id
+    }).all()
 
     # 2. Resumen por categoría para gráfico de pastel
     category_chart = db.session.query(
@@ -495,30 +568,19 @@ def dashboard_data():
     ).order_by(func.sum(Expense.amount).desc()).all()
 
     # 3. Comparación mes anterior vs mes actual
-    if start_of_month.month == 1:
-        prev_month_start = date(start_of_month.year - 1, 12, 1)
-    else:
-        prev_month_start = date(start_of_month.year, start_of_month.month - 1, 1)
-
-    prev_month_end = start_of_month - timedelta(days=1)
+    prev_month_start = month['prev_month_start']
+    prev_month_end = month['prev_month_end']
 
-    current_month_total = db.session.query(
-        func.coalesce(func.sum(Expense.amount), 0)
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.is_paid == True,
-        Expense.due_date >= start_of_month,
-        Expense.due_date <= end_of_month
-    ).scalar() or 0
+    current_month_total = get_user_month_totals(current_user.id)['paid']
 
-    prev_month_total = db.session.query(
+    prev_month_total = float(db.session.query(
         func.coalesce(func.sum(Expense.amount), 0)
     ).filter(
         Expense.created_by == current_user.id,
         Expense.is_paid == True,
         Expense.due_date >= prev_month_start,
         Expense.due_date <= prev_month_end
-    ).scalar() or 0
+    ).scalar() or 0)
 
     # Calcular porcentaje de cambio
     if prev_month_total > 0:
@@ -548,9 +610,9 @@ def dashboard_data():
 
     return jsonify({
         'daily_expenses': {
-            'labels': days_in_month,
-            'data': [daily_data[day]['total'] for day in days_in_month],
-            'counts': [daily_data[day]['count'] for day in days_in_month]
+            'labels': [row.day for row in daily_expenses],
+            'data': [float(row.total) for row in daily_expenses],
+            'counts': [row.count for row in daily_expenses]
         },
         'category_chart': [{
             'name': cat.name,
@@ -576,66 +638,28 @@ def dashboard_data():
 @login_required
 def expenses_summary():
     """Resumen de gastos para tarjetas del dashboard"""
-    today = date.today()
-    start_of_month = today.replace(day=1)
-    end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-    # Gastos del mes actual
-    current_month = db.session.query(
-        func.coalesce(func.sum(Expense.amount), 0)
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.due_date >= start_of_month,
-        Expense.due_date <= end_of_month
-    ).scalar() or 0
-
-    # Gastos pendientes del mes
-    pending_month = db.session.query(
-        func.coalesce(func.sum(Expense.amount), 0)
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.is_paid == False,
-        Expense.due_date >= start_of_month,
-        Expense.due_date <= end_of_month
-    ).scalar() or 0
-
-    # Gastos vencidos
-    overdue_total = db.session.query(
-        func.coalesce(func.sum(Expense.amount), 0)
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.is_paid == False,
-        Expense.due_date < today
-    ).scalar() or 0
-
-    # Gastos fijos vs recurrentes
-    fixed_total = db.session.query(
-        func.coalesce(func.sum(Expense.amount), 0)
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.is_recurring == False,
-        Expense.due_date >= start_of_month,
-        Expense.due_date <= end_of_month
-    ).scalar() or 0
-
-    recurring_total = db.session.query(
-        func.coalesce(func.sum(Expense.amount), 0)
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.is_recurring == True,
-        Expense.due_date >= start_of_month,
-        Expense.due_date <= end_of_month
-    ).scalar() or 0
-
-    # Gastos por pagar en próximos 7 días
-    next_week = today + timedelta(days=7)
-    upcoming_total = db.session.query(
-        func.coalesce(func.sum(Expense.amount), 0)
-    ).filter(
-        Expense.created_by == current_user.id,
-        Expense.is_paid == False,
-        Expense.due_date.between(today, next_week)
-    ).scalar() or 0
+    month = get_month_range()
+    today = month['today']
+    start_of_month = month['start_of_month']
+    end_of_month = month['end_of_month']
+
+    # Gastos del mes actual (compartido con dashboard_data dentro de la petición)
+    current_month = get_user_month_totals(current_user.id)['total']
+
+    # Pendientes, vencidos, fijos/recurrentes y próximos 7 días en una sola consulta
+    summary = db.session.execute(EXPENSES_SUMMARY_STMT, {
+        'uid': current_user.id,
+        'som': start_of_month,
+        'eom': end_of_month,
+        'today': today,
+        'next_week': today + timedelta(days=7)
+    }).one()
+
+    pending_month = summary.pending_month
+    overdue_total = summary.overdue_total
+    fixed_total = summary.fixed_total
+    recurring_total = summary.recurring_total
+    upcoming_total = summary.upcoming_total
 
     return jsonify({
         'current_month': float(current_month),
@@ -655,18 +679,25 @@ def expense_notifications():
     today = date.today()
     next_week = today + timedelta(days=7)
 
-    # Gastos próximos (próximos 7 días)
-    upcoming = Expense.query.filter(
+    # Gastos próximos (próximos 7 días); days_until se calcula en SQL
+    upcoming = Expense.query.options(
+        lazyload(Expense.category_ref), lazyload(Expense.creator)
+    ).add_columns(
+        Expense.days_until.label('days_until')
+    ).filter(
         Expense.created_by == current_user.id,
         Expense.is_paid == False,
         Expense.due_date.between(today, next_week)
     ).order_by(Expense.due_date).limit(10).all()
 
     # Gastos vencidos
-    overdue = Expense.query.filter(
+    overdue = Expense.query.options(
+        lazyload(Expense.category_ref), lazyload(Expense.creator)
+    ).add_columns(
+        Expense.days_until.label('days_until')
+    ).filter(
         Expense.created_by == current_user.id,
-        Expense.is_paid == False,
-        Expense.due_date < today
+        Expense.is_overdue
     ).order_by(Expense.due_date).limit(10).all()
 
     # Gastos recurrentes próximos a renovar
@@ -675,25 +706,30 @@ def expense_notifications():
         Expense.is_recurring == True,
         Expense.auto_renew == True,
         Expense.due_date <= next_week
+    ).options(
+        lazyload(Expense.category_ref), lazyload(Expense.creator)
     ).limit(5).all()
 
+    # Nombres de categoría desde la caché en memoria (sin JOIN)
+    categories = categories_dict()
+
     return jsonify({
         'upcoming': [{
             'id': e.id,
             'description': e.description,
             'amount': float(e.amount),
             'due_date': e.due_date.isoformat(),
-            'days_until': e.days_until,
-            'category': e.category_ref.name if e.category_ref else 'Sin categoría'
-        } for e in upcoming],
+            'days_until': days_until,
+            'category': categories.get(e.category_id, ('Sin categoría', None))[0]
+        } for e, days_until in upcoming],
         'overdue': [{
             'id': e.id,
             'description': e.description,
             'amount': float(e.amount),
             'due_date': e.due_date.isoformat(),
-            'days_overdue': abs(e.days_until) if e.days_until < 0 else 0,
-            'category': e.category_ref.name if e.category_ref else 'Sin categoría'
-        } for e in overdue],
+            'days_overdue': abs(days_until) if days_until < 0 else 0,
+            'category': categories.get(e.category_id, ('Sin categoría', None))[0]
+        } for e, days_until in overdue],
         'renewing_soon': [{
             'id': e.id,
             'description': e.description,
@@ -735,10 +771,16 @@ def expense_search():
     elif status == 'paid':
         search_query = search_query.filter_by(is_paid=True)
     elif status == 'overdue':
-        search_query = search_query.filter_by(is_paid=False).filter(Expense.due_date < date.today())
+        search_query = search_query.filter(Expense.is_overdue)
+
+    # Ejecutar búsqueda (is_overdue viene calculado en la misma fila)
+    results = search_query.options(
+        lazyload(Expense.category_ref), lazyload(Expense.creator)
+    ).add_columns(
+        Expense.is_overdue.label('is_overdue')
+    ).order_by(Expense.due_date.desc()).limit(20).all()
 
-    # Ejecutar búsqueda
-    results = search_query.order_by(Expense.due_date.desc()).limit(20).all()
+    categories = categories_dict()
 
     return jsonify([{
         'id': e.id,
@@ -746,15 +788,15 @@ def expense_search():
         'amount': float(e.amount),
         'due_date': e.due_date.isoformat(),
         'is_paid': e.is_paid,
-        'is_overdue': e.is_overdue,
+        'is_overdue': bool(is_overdue),
         'category': {
             'id': e.category_id,
-            'name': e.category_ref.name if e.category_ref else 'Sin categoría',
-            'color': e.category_ref.color if e.category_ref else None
+            'name': categories.get(e.category_id, ('Sin categoría', None))[0],
+            'color': categories.get(e.category_id, ('Sin categoría', None))[1]
         },
         'type': 'Recurrente' if e.is_recurring else 'Fijo',
         'notes': e.notes or ''
-    } for e in results])
+    } for e, is_overdue in results])
 
 
 @bp.route('/api/analytics/monthly')
@@ -1006,6 +1048,7 @@ def category_create():
 
         db.session.add(category)
         db.session.commit()
+        invalidate_categories_cache()
 
         flash('Categoría creada exitosamente', 'success')
         return redirect(url_for('expenses.categories_list'))
@@ -1038,4 +1081,5 @@ def create_default_categories():
             )
             db.session.add(category)
 
-    db.session.commit()
\ No newline at end of file
+    db.session.commit()
+    invalidate_categories_cache()
\ No newline at end of file
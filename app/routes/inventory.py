@@ -4,14 +4,22 @@
 # Actualizado con sistema híbrido de imágenes
 # Añadida funcionalidad de eliminación automática de fondo
 
+import base64
+import hashlib
 import logging
 import os
 import json
 import re
-from datetime import datetime, date
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+import shutil
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from datetime import date
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, abort
 from flask_login import login_required, current_user
-from sqlalchemy import or_
+from sqlalchemy import or_, func, case, tuple_, insert, select, delete, literal, lambda_stmt, event
+from sqlalchemy.orm import selectinload, joinedload, raiseload, load_only, Session, object_session
 from werkzeug.utils import secure_filename
 
 from app import db
@@ -23,7 +31,11 @@ from app.forms.laptop_forms import LaptopForm, FilterForm
 from app.services.sku_service import SKUService
 from app.services.catalog_service import CatalogService
 from app.services.image_background_service import background_service
-from app.utils.decorators import admin_required
+from app.utils.decorators import admin_required, cache_response
+from app.utils.json_provider import ORJSON_AVAILABLE, orjson
+
+# Parser JSON de los campos ocultos del formulario (orjson si está instalado)
+json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -33,16 +45,121 @@ inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 
 # Configuración de imágenes
 UPLOAD_FOLDER = 'static/uploads/laptops'
+STATIC_ROOT = os.path.join('app', 'static')  # Rutas relativas de BD -> disco
+UPLOAD_ROOT = os.path.join('app', UPLOAD_FOLDER)
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
-ALLOWED_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'gif'}
+ALLOWED_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.webp', '.gif'})
+
+# Slots de imagen del formulario: (número, campo archivo/ruta, alt, portada)
+IMAGE_SLOTS = tuple(
+    (i, f'image_{i}', f'image_{i}_alt', f'image_{i}_is_cover') for i in range(1, 9)
+)
+
+MAX_PER_PAGE = 100  # Tope de ?per_page en el listado
 
 # Configuración de eliminación de fondo
 REMOVE_BG_ENABLED = True  # Se puede obtener de la configuración de la app
 REMOVE_BG_DEFAULT_COVER = True  # Aplicar a portada por defecto
 
+# Columnas que se cargan en cada vista (evita traer HTML/JSON largos que no se usan)
+LAPTOP_LIST_COLUMNS = (
+    Laptop.id, Laptop.sku, Laptop.display_name, Laptop.category,
+    Laptop.sale_price, Laptop.discount_price, Laptop.quantity, Laptop.min_alert,
+    Laptop.is_published, Laptop.is_featured, Laptop.entry_date,
+    Laptop.brand_id, Laptop.model_id, Laptop.processor_id,
+    Laptop.graphics_card_id, Laptop.ram_id, Laptop.storage_id
+)
+
+LAPTOP_DETAIL_COLUMNS = LAPTOP_LIST_COLUMNS + (
+    Laptop.slug, Laptop.condition, Laptop.npu, Laptop.keyboard_layout,
+    Laptop.storage_upgradeable, Laptop.ram_upgradeable,
+    Laptop.purchase_cost, Laptop.tax_percent, Laptop.reserved_quantity,
+    Laptop.sale_date, Laptop.internal_notes, Laptop.created_at, Laptop.updated_at,
+    Laptop.os_id, Laptop.screen_id, Laptop.store_id, Laptop.location_id, Laptop.supplier_id
+)
+
+# Relaciones que muestran las vistas de detalle: catálogos con JOIN en la misma
+# consulta, imágenes (colección) en un segundo SELECT ... IN
+LAPTOP_DETAIL_LOADS = (
+    joinedload(Laptop.brand),
+    joinedload(Laptop.model),
+    joinedload(Laptop.processor),
+    joinedload(Laptop.operating_system),
+    joinedload(Laptop.screen),
+    joinedload(Laptop.graphics_card),
+    joinedload(Laptop.storage),
+    joinedload(Laptop.ram),
+    joinedload(Laptop.store),
+    joinedload(Laptop.location),
+    joinedload(Laptop.supplier),
+    selectinload(Laptop.images)
+)
+
+
+def detail_load_options():
+    """
+    Opciones de carga del detalle; en desarrollo añade raiseload('*') para que
+    cualquier relación que el template use sin precargar lance error
+    """
+    if current_app.debug:
+        return (*LAPTOP_DETAIL_LOADS, raiseload('*'))
+    return LAPTOP_DETAIL_LOADS
+
+
+# Campos de catálogo del formulario (FK de Laptop) que resuelve CatalogService
+LAPTOP_CATALOG_FIELDS = (
+    'brand_id', 'model_id', 'processor_id', 'os_id', 'screen_id',
+    'graphics_card_id', 'storage_id', 'ram_id', 'store_id',
+    'location_id', 'supplier_id'
+)
+
+# Campos del formulario que se copian tal cual a Laptop
+LAPTOP_FORM_FIELDS = (
+    # Marketing y SEO
+    'display_name', 'short_description', 'long_description_html',
+    'is_published', 'is_featured', 'seo_title', 'seo_description',
+    # Detalles tecnicos
+    'npu', 'storage_upgradeable', 'ram_upgradeable', 'keyboard_layout',
+    # Estado y categoria
+    'category', 'condition',
+    # Financieros e inventario
+    'purchase_cost', 'sale_price', 'quantity', 'min_alert',
+    # Notas
+    'internal_notes'
+)
+
+
+def laptop_form_values(form):
+    """
+    Valores de Laptop tomados del formulario (sin catálogos, slug ni puertos)
+
+    Returns:
+        dict: {columna: valor} listo para Laptop(**values) o setattr
+    """
+    values = {field: form[field].data for field in LAPTOP_FORM_FIELDS}
+
+    # Opcionales con valor por defecto
+    values['discount_price'] = form.discount_price.data or None
+    values['tax_percent'] = form.tax_percent.data or 0
+    values['reserved_quantity'] = form.reserved_quantity.data or 0
+
+    return values
 
 # ===== FUNCIONES DE UTILIDAD (EXISTENTES) =====
 
+# Patrones de generate_slug, compilados una sola vez
+_RE_SLUG_INVALID = re.compile(r'[^\w\s-]')
+_RE_SLUG_SEPARATORS = re.compile(r'[-\s]+')
+
+# Camino rápido para texto ASCII: los espacios pasan a guion y se borra todo lo
+# que no sea alfanumérico, '_' o '-' (mismo resultado que los patrones de arriba)
+_SLUG_ASCII_TABLE = str.maketrans({
+    c: ('-' if chr(c).isspace() else None)
+    for c in range(128)
+    if not (chr(c).isalnum() or chr(c) in '_-')
+})
+
+
 def generate_slug(text):
     """
     Genera un slug URL-friendly a partir de texto
@@ -55,10 +172,15 @@ def generate_slug(text):
     """
     # Convertir a minusculas y reemplazar espacios
     slug = text.lower().strip()
+
+    # La mayoría de nombres son ASCII: traducción en C sin regex
+    if slug.isascii():
+        return '-'.join(part for part in slug.translate(_SLUG_ASCII_TABLE).split('-') if part)
+
     # Eliminar caracteres especiales, mantener solo alfanumericos y espacios
-    slug = re.sub(r'[^\w\s-]', '', slug)
+    slug = _RE_SLUG_INVALID.sub('', slug)
     # Reemplazar espacios y guiones multiples con un solo guion
-    slug = re.sub(r'[-\s]+', '-', slug)
+    slug = _RE_SLUG_SEPARATORS.sub('-', slug)
     # Eliminar guiones al inicio y final
     slug = slug.strip('-')
     return slug
@@ -75,20 +197,27 @@ def ensure_unique_slug(base_slug, laptop_id=None):
     Returns:
         str: Slug unico
     """
-    slug = base_slug
-    counter = 1
-
-    while True:
-        query = Laptop.query.filter_by(slug=slug)
-        if laptop_id:
-            query = query.filter(Laptop.id != laptop_id)
+    # Una sola consulta trae el slug base y todas sus variantes "<base>-N"
+    query = db.session.query(Laptop.slug).filter(
+        or_(
+            Laptop.slug == base_slug,
+            Laptop.slug.startswith(f"{base_slug}-", autoescape=True)
+        )
+    )
+    if laptop_id:
+        query = query.filter(Laptop.id != laptop_id)
 
-        if not query.first():
-            return slug
+    taken = {row.slug for row in query}
 
+    # Primer sufijo libre (mismo resultado que probar uno a uno contra la BD)
+    slug = base_slug
+    counter = 1
+    while slug in taken:
         slug = f"{base_slug}-{counter}"
         counter += 1
 
+    return slug
+
 
 def process_connectivity_ports(form_data):
     """
@@ -103,12 +232,21 @@ def process_connectivity_ports(form_data):
     if not form_data:
         return {}
 
-    # Convertir lista a diccionario con conteo
-    ports = {}
-    for port in form_data:
-        ports[port] = ports.get(port, 0) + 1
+    # Convertir lista a diccionario con conteo (dict plano para la columna JSON)
+    return dict(Counter(form_data))
 
-    return ports
+
+def flash_form_errors(form):
+    """
+    Un único flash con todos los errores del formulario
+
+    Cada flash se serializa en la cookie de sesión; agruparlos mantiene el
+    Set-Cookie pequeño. Separador en una sola línea: laptop_form.html inserta
+    el mensaje dentro de un literal JavaScript.
+    """
+    messages = [f'Error en {field}: ' + '; '.join(errors) for field, errors in form.errors.items()]
+    if messages:
+        flash(' | '.join(messages), 'error')
 
 
 def allowed_image_file(filename):
@@ -121,9 +259,116 @@ def allowed_image_file(filename):
     Returns:
         bool: True si es permitido, False si no
     """
-    if not filename:
-        return False
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
+    return bool(filename) and os.path.splitext(filename)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
+
+
+def static_path(relative_path):
+    """Ruta en disco de una ruta relativa a static/ guardada en BD"""
+    return os.path.join(STATIC_ROOT, relative_path)
+
+
+@lru_cache(maxsize=4096)
+def laptop_upload_dir(laptop_id):
+    """
+    Directorio de imágenes de una laptop, creado la primera vez que se pide
+
+    Cacheado por proceso: las siguientes subidas no repiten el makedirs.
+    laptop_delete llama a laptop_upload_dir.cache_clear() al borrar la carpeta.
+    """
+    path = os.path.join(UPLOAD_ROOT, str(laptop_id))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# Firmas (magic bytes) de los formatos de imagen aceptados
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+def sniff_image_type(file):
+    """
+    Identifica el formato real de una subida por sus primeros bytes
+
+    Solo lee la cabecera (16 bytes) y deja el stream donde estaba, así un
+    archivo con extensión .jpg que no es una imagen se rechaza antes de
+    escribir nada en disco.
+
+    Returns:
+        str | None: 'jpg', 'png', 'gif', 'webp' o None si no coincide
+    """
+    stream = file.stream
+    position = stream.tell()
+    head = stream.read(16)
+    stream.seek(position)
+
+    # WebP es un contenedor RIFF con la marca WEBP en el offset 8
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    for signature, image_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_type
+    return None
+
+
+# Tamaño de bloque para hashear y copiar subidas sin cargarlas enteras en memoria
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def upload_size(file):
+    """
+    Tamaño en bytes de un archivo subido, dejando el puntero donde estaba
+
+    Werkzeug 3 guarda cada parte en un SpooledTemporaryFile (en memoria hasta
+    500KB). seek/tell funciona igual en memoria y en disco; fileno() en cambio
+    obligaría a volcar a disco las subidas pequeñas.
+    """
+    stream = file.stream
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
+
+def save_upload(file, folder, prefix, extension):
+    """
+    Guarda un archivo subido con nombre único por registro
+
+    Copia el stream por bloques a un temporal de la misma carpeta calculando el
+    SHA-256 a la vez, y al terminar lo mueve con os.replace (atómico) a
+    <prefix>_<hash>_<uuid>.<ext>. El sufijo aleatorio evita que dos imágenes
+    compartan archivo: la eliminación de fondo reescribe el archivo de una
+    sola imagen.
+
+    Args:
+        file: FileStorage de werkzeug
+        folder: Directorio destino
+        prefix: Prefijo del nombre (SKU)
+        extension: Extensión sin punto
+
+    Returns:
+        tuple: (filename, filepath)
+    """
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(folder, f".{prefix}_{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'wb') as out:
+            for block in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(block)
+                out.write(block)
+
+        filename = f"{prefix}_{digest.hexdigest()[:16]}_{uuid.uuid4().hex[:8]}.{extension}"
+        filepath = os.path.join(folder, filename)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return filename, filepath
 
 
 # ===== NUEVA FUNCIÓN: PROCESAMIENTO DE ELIMINACIÓN DE FONDO =====
@@ -171,6 +416,81 @@ def _process_background_removal(image_path, image_info, is_cover=False):
         return False, f"Error inesperado: {str(e)}", None
 
 
+# ===== ELIMINACIÓN DE FONDO EN SEGUNDO PLANO =====
+
+# rembg ejecuta un modelo de IA (U2Net) pesado en CPU: se procesa fuera del hilo
+# de la petición. Un solo worker para no saturar memoria con varias inferencias.
+_bg_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='remove-bg')
+
+
+def _run_background_removal_jobs(app, laptop_id, jobs):
+    """
+    Procesa en segundo plano la eliminación de fondo de imágenes ya guardadas
+
+    Args:
+        app: Instancia de la aplicación (para abrir contexto y sesión propios)
+        laptop_id: ID de la laptop
+        jobs: Lista de tuplas (image_id, filepath, is_cover, slot)
+    """
+    with app.app_context():
+        try:
+            for image_id, filepath, is_cover, slot in jobs:
+                # Registros anteriores pueden compartir archivo: no reescribirlo
+                image_path = db.session.query(LaptopImage.image_path).filter_by(id=image_id).scalar()
+                if image_path is None:
+                    continue
+                if LaptopImage.query.filter_by(image_path=image_path).count() > 1:
+                    logger.warning(
+                        f"⚠️  Laptop {laptop_id}, imagen {slot}: archivo compartido por varias imágenes, "
+                        f"se omite la eliminación de fondo"
+                    )
+                    continue
+
+                success, message, processed_path = _process_background_removal(
+                    filepath,
+                    f"Imagen {slot} (ID: {image_id})",
+                    is_cover=is_cover
+                )
+
+                if not success:
+                    logger.warning(f"⚠️  Laptop {laptop_id}, imagen {slot}: {message}")
+                    continue
+
+                # Actualizar ruta de la imagen si cambió (a PNG)
+                if processed_path and processed_path != filepath:
+                    new_relative_path = f"uploads/laptops/{laptop_id}/{os.path.basename(processed_path)}"
+                    LaptopImage.query.filter_by(id=image_id).update(
+                        {'image_path': new_relative_path}, synchronize_session=False
+                    )
+                    logger.info(f"🔄 Ruta actualizada a: {new_relative_path}")
+
+            db.session.commit()
+            logger.info(f"✅ Eliminación de fondo completada para laptop {laptop_id}")
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"❌ Error en eliminación de fondo en segundo plano: {str(e)}", exc_info=True)
+
+        finally:
+            db.session.remove()
+
+
+def enqueue_background_removal(laptop_id, jobs):
+    """
+    Encola la eliminación de fondo (llamar DESPUÉS del commit)
+
+    Returns:
+        int: Número de imágenes encoladas
+    """
+    if not jobs:
+        return 0
+
+    app = current_app._get_current_object()
+    _bg_executor.submit(_run_background_removal_jobs, app, laptop_id, jobs)
+    logger.info(f"🎨 {len(jobs)} imagen(es) encoladas para eliminación de fondo")
+    return len(jobs)
+
+
 # ===== FUNCIÓN MODIFICADA: PROCESAMIENTO DE IMÁGENES CON ELIMINACIÓN DE FONDO =====
 
 def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=False):
@@ -192,7 +512,8 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
         remove_bg_all: Si eliminar fondo de todas las imágenes
 
     Returns:
-        tuple: (success_count, error_messages, bg_processed_count, bg_error_messages)
+        tuple: (success_count, error_messages, bg_jobs, bg_error_messages)
+        bg_jobs se pasa a enqueue_background_removal() tras el commit
     """
     logger.info(f"\n{'=' * 60}")
     logger.info(f"📸 PROCESANDO IMÁGENES PARA LAPTOP ID: {laptop.id}")
@@ -201,7 +522,7 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
 
     success_count = 0
     error_messages = []
-    bg_processed_count = 0
+    bg_jobs = []
     bg_error_messages = []
 
     # Determinar si aplicar eliminación de fondo a portada
@@ -210,78 +531,93 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
 
     # ===== PASO 1: ELIMINAR IMÁGENES MARCADAS =====
     images_to_delete_json = request.form.get('images_to_delete', '[]')
+    delete_ids = set()
+    deleted_paths = set()
 
     try:
-        images_to_delete = json.loads(images_to_delete_json)
+        images_to_delete = json_loads(images_to_delete_json)
         logger.info(f"🗑️  Imágenes marcadas para eliminar: {len(images_to_delete)}")
 
         for image_id in images_to_delete:
             # Convertir a int si viene como string
             try:
-                image_id = int(image_id)
+                delete_ids.add(int(image_id))
             except (ValueError, TypeError):
                 logger.warning(f"⚠️  ID inválido: {image_id}")
-                continue
-
-            image = LaptopImage.query.get(image_id)
-
-            if image and image.laptop_id == laptop.id:
-                # Eliminar archivo físico
-                image_full_path = os.path.join('app', 'static', image.image_path)
-                if os.path.exists(image_full_path):
-                    try:
-                        os.remove(image_full_path)
-                        logger.info(f"✅ Archivo eliminado: {image.image_path}")
-                    except Exception as e:
-                        logger.error(f"⚠️  Error al eliminar archivo {image.image_path}: {str(e)}")
-
-                # Eliminar registro de BD
-                db.session.delete(image)
-                logger.info(f"✅ Registro eliminado: imagen ID {image_id}")
-            else:
-                logger.warning(f"⚠️  Imagen ID {image_id} no encontrada o no pertenece al laptop")
 
-    except json.JSONDecodeError as e:
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError hereda de esta
         logger.error(f"⚠️  Error al decodificar images_to_delete: {str(e)}")
-        images_to_delete = []
 
-    # Flush para aplicar eliminaciones antes de continuar
-    db.session.flush()
+    if delete_ids:
+        # Un único DELETE ... RETURNING: sin SELECT por imagen ni sincronizar la sesión.
+        # El filtro por laptop_id impide borrar imágenes de otra laptop
+        deleted_rows = db.session.execute(
+            delete(LaptopImage).where(
+                LaptopImage.id.in_(delete_ids),
+                LaptopImage.laptop_id == laptop.id
+            ).returning(LaptopImage.id, LaptopImage.image_path),
+            execution_options={'synchronize_session': False}
+        ).all()
+
+        # El archivo se borra en el PASO 2 si ninguna otra imagen lo usa
+        deleted_paths = {row.image_path for row in deleted_rows}
+        logger.info(f"✅ Registros eliminados: {sorted(row.id for row in deleted_rows)}")
+
+        missing_ids = delete_ids - {row.id for row in deleted_rows}
+        if missing_ids:
+            logger.warning(f"⚠️  Imágenes {sorted(missing_ids)} no encontradas o no pertenecen al laptop")
+
+        # La colección cargada (si lo estaba) ya no refleja la BD
+        db.session.expire(laptop, ['images'])
 
     # ===== PASO 2: OBTENER IMÁGENES EXISTENTES (que NO fueron eliminadas) =====
     existing_images = LaptopImage.query.filter_by(laptop_id=laptop.id).all()
 
     logger.info(f"\n📊 Imágenes existentes en BD después de eliminaciones: {len(existing_images)}")
 
+    # Índice por ruta para emparejar los slots del formulario
+    existing_by_path = {img.image_path: img for img in existing_images}
+
+    # Los nombres van por contenido: dos registros pueden compartir archivo
+    for orphan_path in deleted_paths - existing_by_path.keys():
+        image_full_path = static_path(orphan_path)
+        if os.path.exists(image_full_path):
+            try:
+                os.remove(image_full_path)
+                logger.info(f"✅ Archivo eliminado: {orphan_path}")
+            except Exception as e:
+                logger.error(f"⚠️  Error al eliminar archivo {orphan_path}: {str(e)}")
+
     # ===== PASO 3: PROCESAR SLOTS DEL FORMULARIO (1-8) =====
+    # is_cover no se escribe imagen por imagen: se guarda la petición de portada
+    # y el PASO 5 la asigna con un único UPDATE (restricción de una portada)
     processed_images = []
+    cover_requested = set()
     new_images = []  # Para trackear imágenes nuevas para eliminación de fondo
+    files, form_data = request.files, request.form
 
-    for i in range(1, 9):  # Slots 1-8
+    for i, field, alt_field, cover_field in IMAGE_SLOTS:
         try:
-            file = request.files.get(f'image_{i}')
-            alt_text = request.form.get(f'image_{i}_alt', '')
-            image_path = request.form.get(f'image_{i}', '')
-            is_cover_input = request.form.get(f'image_{i}_is_cover', 'false')
-            is_cover = is_cover_input.lower() == 'true'
+            file = files.get(field)
+            alt_text = form_data.get(alt_field, '')
+            image_path = form_data.get(field, '')
+            is_cover = form_data.get(cover_field, 'false').lower() == 'true'
 
             # CASO A: Archivo nuevo subido
-            if file and file.filename and allowed_image_file(file.filename):
+            if file and file.filename:
                 logger.info(f"\n➕ SLOT {i}: Nuevo archivo detectado")
                 logger.info(f"   Nombre: {file.filename}")
                 logger.info(f"   Es portada: {is_cover}")
 
-                # Validar extensión del archivo
-                if not allowed_image_file(file.filename):
+                # Validar nombre y extensión del archivo (sin rutas embebidas)
+                if '/' in file.filename or '\\' in file.filename or not allowed_image_file(secure_filename(file.filename)):
                     error_msg = f'Imagen {i}: Formato no permitido. Use JPG, PNG, WebP o GIF.'
                     error_messages.append(error_msg)
                     logger.warning(f'Laptop {laptop.sku}: {error_msg}')
                     continue
 
-                # Validar tamaño del archivo
-                file.seek(0, os.SEEK_END)
-                file_size = file.tell()
-                file.seek(0)  # Volver al inicio para guardar
+                # Validar tamaño del archivo (MAX_CONTENT_LENGTH ya corta antes las peticiones enormes)
+                file_size = upload_size(file)
 
                 if file_size > MAX_IMAGE_SIZE:
                     error_msg = f'Imagen {i}: Archivo muy grande ({file_size / 1024 / 1024:.1f}MB). Máximo 5MB.'
@@ -289,37 +625,36 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
                     logger.warning(f'Laptop {laptop.sku}: {error_msg}')
                     continue
 
-                # Generar nombre seguro para el archivo
-                filename = secure_filename(file.filename)
-                # Agregar timestamp para evitar colisiones
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                extension = filename.rsplit('.', 1)[1].lower()
-                filename = f"{laptop.sku}_{i}_{timestamp}.{extension}"
+                # Validar contenido: la extensión guardada es la del formato real
+                extension = sniff_image_type(file)
+                if extension is None:
+                    error_msg = f'Imagen {i}: El contenido no es una imagen JPG, PNG, WebP o GIF válida.'
+                    error_messages.append(error_msg)
+                    logger.warning(f'Laptop {laptop.sku}: {error_msg}')
+                    continue
 
-                # Crear directorio si no existe
-                upload_folder = os.path.join('app', 'static', 'uploads', 'laptops', str(laptop.id))
-                os.makedirs(upload_folder, exist_ok=True)
+                # Directorio de la laptop (se crea una sola vez por proceso)
+                upload_folder = laptop_upload_dir(laptop.id)
 
-                # Guardar archivo
-                filepath = os.path.join(upload_folder, filename)
-                file.save(filepath)
+                # Guardar archivo (nombre único; hash SHA-256 y escritura por bloques)
+                filename, filepath = save_upload(file, upload_folder, laptop.sku, extension)
 
                 # Ruta relativa para la base de datos
                 relative_path = f"uploads/laptops/{laptop.id}/{filename}"
 
-                # Crear registro de imagen
+                # Crear registro de imagen (la portada se asigna en el PASO 5)
                 image = LaptopImage(
                     laptop_id=laptop.id,
                     image_path=relative_path,
                     alt_text=alt_text or f"{laptop.display_name} - imagen {i}",
-                    is_cover=is_cover,
+                    is_cover=False,
                     ordering=i,
                     position=i
                 )
 
-                db.session.add(image)
-                db.session.flush()  # Para obtener el ID
                 processed_images.append(image)
+                if is_cover:
+                    cover_requested.add(image)
                 success_count += 1
 
                 # Marcar como nueva imagen para posible eliminación de fondo
@@ -331,7 +666,6 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
                 })
 
                 logger.info(f'   ✅ Guardado como: {filename}')
-                logger.info(f'   ✅ Registro creado: ID {image.id}')
 
             # CASO B: Imagen existente (mantener y actualizar)
             elif image_path:
@@ -339,12 +673,12 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
                 logger.info(f"   Path: {image_path[:50]}...")
                 logger.info(f"   Es portada: {is_cover}")
 
-                # Buscar imagen existente por path
-                existing_img = None
-                for img in existing_images:
-                    if img.image_path == image_path or image_path.endswith(img.image_path):
-                        existing_img = img
-                        break
+                # Buscar imagen existente por path (exacto en O(1); si el form
+                # envía la URL completa, por sufijo)
+                existing_img = existing_by_path.get(image_path) or next(
+                    (img for path, img in existing_by_path.items() if image_path.endswith(path)),
+                    None
+                )
 
                 if existing_img:
                     logger.info(f"   ✅ Encontrada: ID {existing_img.id}")
@@ -353,8 +687,9 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
                     existing_img.alt_text = alt_text or existing_img.alt_text
                     existing_img.position = i
                     existing_img.ordering = i
-                    existing_img.is_cover = is_cover
                     processed_images.append(existing_img)
+                    if is_cover:
+                        cover_requested.add(existing_img)
 
                     logger.info(
                         f"   ✅ Actualizada: posición {i}, alt: {alt_text[:30] if alt_text else 'sin cambios'}...")
@@ -366,6 +701,12 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
             error_messages.append(error_msg)
             logger.error(f'Laptop {laptop.sku}: {error_msg}', exc_info=True)
 
+    # Registros nuevos en bloque: un solo flush asigna todos los IDs
+    if new_images:
+        db.session.add_all([new_img['image'] for new_img in new_images])
+        db.session.flush()
+        logger.info(f"   ✅ Registros creados: {[new_img['image'].id for new_img in new_images]}")
+
     # ===== PASO 4: PROCESAR ELIMINACIÓN DE FONDO PARA IMÁGENES NUEVAS =====
     if new_images and (remove_bg_cover or remove_bg_all):
         logger.info(f"\n🎨 PROCESANDO ELIMINACIÓN DE FONDO")
@@ -391,27 +732,13 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
                 continue
 
             if should_process:
-                logger.info(f"\n   🎨 Procesando imagen slot {slot} ({reason})")
-                logger.info(f"      Ruta: {filepath}")
-
-                success, message, processed_path = _process_background_removal(
-                    filepath,
-                    f"Imagen {slot} (ID: {image_obj.id})",
-                    is_cover=is_cover
-                )
-
-                if success:
-                    bg_processed_count += 1
-                    logger.info(f"      ✅ {message}")
+                # Comprobar disponibilidad ahora para informar al usuario de inmediato
+                if not REMOVE_BG_ENABLED or not background_service.is_available():
+                    bg_error_messages.append(f"Imagen {slot}: Servicio de eliminación de fondo no disponible")
+                    continue
 
-                    # Actualizar ruta de la imagen si cambió (a PNG)
-                    if processed_path and processed_path != filepath:
-                        new_relative_path = f"uploads/laptops/{laptop.id}/{os.path.basename(processed_path)}"
-                        image_obj.image_path = new_relative_path
-                        logger.info(f"      🔄 Ruta actualizada a: {new_relative_path}")
-                else:
-                    bg_error_messages.append(f"Imagen {slot}: {message}")
-                    logger.warning(f"      ⚠️  {message}")
+                logger.info(f"   🎨 Imagen slot {slot} encolada ({reason})")
+                bg_jobs.append((image_obj.id, filepath, is_cover, slot))
 
     # ===== PASO 5: ASIGNAR PORTADA Y POSICIONES FINALES =====
     logger.info(f"\n👑 Asignando portada y posiciones finales")
@@ -420,37 +747,37 @@ def process_laptop_images(laptop, form, remove_bg_cover=None, remove_bg_all=Fals
     # Ordenar imágenes por posición
     processed_images.sort(key=lambda img: img.position)
 
-    # Asegurar que exactamente una imagen sea portada
-    cover_assigned = False
+    # Actualizar ordenación
     for idx, img in enumerate(processed_images):
-        # Si esta imagen está marcada como portada y aún no hay portada asignada
-        if img.is_cover and not cover_assigned:
-            cover_assigned = True
-        else:
-            # Solo la primera imagen marcada como portada será realmente portada
-            img.is_cover = False
-
-        # Actualizar ordenación
         img.position = idx + 1
         img.ordering = idx + 1
 
-    # Si no hay portada asignada, hacer la primera imagen la portada
-    if processed_images and not cover_assigned:
-        processed_images[0].is_cover = True
-        logger.info(f"   👑 PORTADA automática: {processed_images[0].image_path}")
-
-    # Loggear qué imagen es la portada
-    for img in processed_images:
-        if img.is_cover:
-            logger.info(f"   👑 PORTADA: {img.image_path}")
+    if processed_images:
+        # Solo la primera imagen marcada como portada será realmente portada;
+        # si no hay ninguna marcada, la primera imagen es la portada
+        cover = next(
+            (img for img in processed_images if img in cover_requested),
+            processed_images[0]
+        )
+        if cover not in cover_requested:
+            logger.info(f"   👑 PORTADA automática: {cover.image_path}")
+
+        # Un único UPDATE atómico: la nueva portada a True y el resto a False
+        db.session.flush()
+        LaptopImage.query.filter(
+            LaptopImage.laptop_id == laptop.id
+        ).update(
+            {'is_cover': LaptopImage.id == cover.id}, synchronize_session=False
+        )
+        logger.info(f"   👑 PORTADA: {cover.image_path}")
 
     logger.info(f"\n{'=' * 60}")
     logger.info(f"✅ PROCESO COMPLETADO")
     logger.info(f"   Imágenes guardadas: {success_count}")
-    logger.info(f"   Fondos eliminados: {bg_processed_count}")
+    logger.info(f"   Fondos por eliminar (en segundo plano): {len(bg_jobs)}")
     logger.info(f"{'=' * 60}\n")
 
-    return success_count, error_messages, bg_processed_count, bg_error_messages
+    return success_count, error_messages, bg_jobs, bg_error_messages
 
 
 # ===== NUEVA RUTA: REPROCESAMIENTO MANUAL DE IMÁGENES =====
@@ -466,7 +793,7 @@ def laptop_remove_background(id):
     - mode: 'cover' (solo portada) o 'all' (todas las imágenes)
     - force: 'true' para reprocesar incluso si ya tiene fondo eliminado
     """
-    laptop = Laptop.query.get_or_404(id)
+    laptop = db.get_or_404(Laptop, id)
 
     # Verificar permisos
     if not current_user.is_admin:
@@ -511,7 +838,7 @@ def laptop_remove_background(id):
         }
 
         for image in target_images:
-            image_path = os.path.join('app', 'static', image.image_path)
+            image_path = static_path(image.image_path)
 
             # Verificar si existe el archivo
             if not os.path.exists(image_path):
@@ -578,6 +905,241 @@ def laptop_remove_background(id):
     return redirect(url_for('inventory.laptop_detail', id=id))
 
 
+# ===== PAGINACIÓN POR CURSOR (KEYSET) =====
+
+class KeysetPagination:
+    """
+    Paginación por cursor (entry_date, id) para el listado de laptops
+
+    Evita el OFFSET y el COUNT(*) de paginate(): cada página se obtiene
+    buscando a partir de la última (o primera) fila de la página anterior.
+    """
+
+    # Parámetros de paginación que no se arrastran a los enlaces
+    PAGE_ARGS = ('cursor', 'before', 'page')
+
+    def __init__(self, items, per_page, has_next, has_prev):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next and bool(items)
+        self.has_prev = has_prev and bool(items)
+
+        # Cursores opacos para los enlaces Siguiente / Anterior
+        self.next_cursor = encode_cursor(items[-1]) if self.has_next else None
+        self.prev_cursor = encode_cursor(items[0]) if self.has_prev else None
+
+    def page_args(self, **cursor):
+        """Argumentos de la URL actual (filtros) con el cursor indicado"""
+        args = {k: v for k, v in request.args.items() if k not in self.PAGE_ARGS}
+        args.update(cursor)
+        return args
+
+
+def encode_cursor(laptop):
+    """Codifica (entry_date, id) como cursor base64 apto para URL"""
+    raw = f"{laptop.entry_date.isoformat()}:{laptop.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _parse_cursor(name):
+    """Decodifica el cursor del parámetro ?<name>= en (fecha, id)"""
+    raw = request.args.get(name, '')
+    if not raw:
+        return None
+
+    try:
+        padded = raw + '=' * (-len(raw) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split(':', 1)
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _fetch_page(stmt, rows_only):
+    """Ejecuta la página: objetos Laptop o filas de columnas"""
+    result = db.session.execute(stmt)
+    return result.all() if rows_only else result.scalars().all()
+
+
+def paginate_keyset(stmt, per_page, rows_only=False):
+    """
+    Aplica paginación por cursor sobre (entry_date, id) en orden descendente
+
+    Acepta ?cursor= (página siguiente) y ?before= (página anterior).
+    ?page= se mantiene como fallback obsoleto con OFFSET para enlaces antiguos.
+
+    Args:
+        stmt: lambda_stmt de select(Laptop) ya filtrado (sin order_by)
+        per_page: Elementos por página
+        rows_only: True si stmt selecciona columnas sueltas (filas, no objetos);
+                   deben incluir Laptop.id y Laptop.entry_date para el cursor
+
+    Returns:
+        KeysetPagination
+    """
+    after = _parse_cursor('cursor')
+    before = _parse_cursor('before')
+    limit = per_page + 1
+
+    if before and not after:
+        # Página anterior: buscar hacia arriba y devolver en orden descendente
+        before_date, before_id = before
+        stmt += lambda s: s.where(
+            tuple_(Laptop.entry_date, Laptop.id) > tuple_(before_date, before_id)
+        ).order_by(Laptop.entry_date.asc(), Laptop.id.asc()).limit(limit)
+
+        rows = _fetch_page(stmt, rows_only)
+        has_prev = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        return KeysetPagination(rows, per_page, has_next=True, has_prev=has_prev)
+
+    offset = 0
+    if after:
+        after_date, after_id = after
+        stmt += lambda s: s.where(
+            tuple_(Laptop.entry_date, Laptop.id) < tuple_(after_date, after_id)
+        )
+    else:
+        # Fallback obsoleto: ?page=N de la paginación anterior
+        page = request.args.get('page', 1, type=int)
+        offset = max(page - 1, 0) * per_page
+
+    stmt += lambda s: s.order_by(
+        Laptop.entry_date.desc(), Laptop.id.desc()
+    ).limit(limit).offset(offset)
+
+    rows = _fetch_page(stmt, rows_only)
+    has_next = len(rows) > per_page
+
+    return KeysetPagination(
+        rows[:per_page], per_page,
+        has_next=has_next,
+        has_prev=after is not None or offset > 0
+    )
+
+
+def serialize_list_item(laptop):
+    """Fila del listado en JSON (objeto Laptop o fila con LAPTOP_LIST_COLUMNS)"""
+    return {
+        'id': laptop.id,
+        'sku': laptop.sku,
+        'display_name': laptop.display_name,
+        'category': laptop.category,
+        'sale_price': float(laptop.sale_price) if laptop.sale_price is not None else None,
+        'discount_price': float(laptop.discount_price) if laptop.discount_price is not None else None,
+        'quantity': laptop.quantity,
+        'min_alert': laptop.min_alert,
+        'is_published': laptop.is_published,
+        'is_featured': laptop.is_featured,
+        'entry_date': laptop.entry_date.isoformat() if laptop.entry_date else None,
+        'brand_id': laptop.brand_id,
+        'model_id': laptop.model_id,
+        'url': url_for('inventory.laptop_detail', id=laptop.id)
+    }
+
+
+# ===== LAPTOPS SIMILARES =====
+
+def get_similar_laptops(laptop, limit=5):
+    """
+    Laptops publicadas de la misma categoría y marca
+
+    Devuelve filas de columnas (id, sku, sale_price, model_name) en lugar de
+    objetos ORM: el bloque "Productos Similares" solo muestra esos datos.
+    """
+    group = _similar_laptops_by_group(laptop.brand_id, laptop.category, limit + 1)
+    return [row for row in group if row.id != laptop.id][:limit]
+
+
+@cache_response(timeout=300)
+def _similar_laptops_by_group(brand_id, category, limit):
+    """
+    Publicadas más recientes de una marca y categoría
+
+    Cacheado por (marca, categoría): todas las laptops del grupo comparten la
+    misma consulta. Se invalida con invalidate_inventory_caches().
+    """
+    return db.session.query(
+        Laptop.id,
+        Laptop.sku,
+        Laptop.sale_price,
+        LaptopModel.name.label('model_name')
+    ).outerjoin(
+        LaptopModel, Laptop.model_id == LaptopModel.id
+    ).filter(
+        Laptop.brand_id == brand_id,
+        Laptop.category == category,
+        Laptop.is_published == True
+    ).order_by(
+        Laptop.entry_date.desc(), Laptop.id.desc()
+    ).limit(limit).all()
+
+
+# ===== ESTADÍSTICAS GLOBALES DEL INVENTARIO =====
+
+@cache_response(timeout=60)
+def get_inventory_stats():
+    """
+    Calcula las estadísticas globales del inventario en una sola consulta agregada
+    Cacheado 60s; se invalida con invalidate_inventory_caches() al modificar laptops
+
+    Returns:
+        tuple: (stats, min_db_price, max_db_price)
+    """
+    row = db.session.query(
+        func.count(Laptop.id).label('total'),
+        func.coalesce(func.sum(Laptop.sale_price * Laptop.quantity), 0).label('total_value'),
+        func.coalesce(func.sum(case((Laptop.is_low_stock, 1), else_=0)), 0).label('low_stock'),
+        func.coalesce(func.sum(case((Laptop.is_published == True, 1), else_=0)), 0).label('published'),
+        func.coalesce(func.sum(case((Laptop.is_featured == True, 1), else_=0)), 0).label('featured'),
+        func.coalesce(func.sum(case((Laptop.rotation_status == 'slow', 1), else_=0)), 0).label('slow_rotation'),
+        # Rango de precios para el filtro, ya sin NULL desde SQL
+        func.coalesce(func.min(Laptop.sale_price), 0).label('min_price'),
+        func.coalesce(func.max(Laptop.sale_price), 10000).label('max_price')
+    ).one()
+
+    stats = {
+        'total': row.total,
+        'total_value': float(row.total_value),
+        'low_stock': int(row.low_stock),
+        'published': int(row.published),
+        'featured': int(row.featured),
+        'slow_rotation': int(row.slow_rotation)
+    }
+
+    return stats, float(row.min_price), float(row.max_price)
+
+
+def invalidate_inventory_caches():
+    """Invalida las estadísticas cacheadas tras crear/editar/eliminar laptops"""
+    get_inventory_stats.cache_clear()
+    _similar_laptops_by_group.cache_clear()
+
+
+# Cualquier cambio ORM sobre Laptop (p.ej. stock descontado por una factura)
+# marca la sesión; las estadísticas se invalidan cuando ese cambio se confirma.
+# Las sentencias masivas (insert/delete directos) llaman a
+# invalidate_inventory_caches() explícitamente.
+@event.listens_for(Laptop, 'after_insert')
+@event.listens_for(Laptop, 'after_update')
+@event.listens_for(Laptop, 'after_delete')
+def _mark_inventory_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['inventory_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('inventory_changed', False):
+        invalidate_inventory_caches()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_inventory_changes(session):
+    session.info.pop('inventory_changed', None)
+
+
 # ===== RUTA PRINCIPAL: LISTADO DE LAPTOPS =====
 
 @inventory_bp.route('/')
@@ -595,24 +1157,46 @@ def laptops_list():
     screen_filter = request.args.get('screen', type=int, default=0)
     condition_filter = request.args.get('condition', '')
     supplier_filter = request.args.get('supplier', type=int, default=0)
-    is_published_filter = request.args.get('is_published', '')
-    is_featured_filter = request.args.get('is_featured', '')
-    has_npu_filter = request.args.get('has_npu', '')
     min_price = request.args.get('min_price', type=float, default=0)
     max_price = request.args.get('max_price', type=float, default=0)
     search_query = request.args.get('q', '').strip()
 
-    # Paginacion
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-
-    # Query base
-    query = Laptop.query
+    # Paginacion (por cursor: ?cursor= / ?before=); per_page acotado a 1..MAX_PER_PAGE
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+
+    # Clientes AJAX / scroll infinito: JSON sin renderizar la plantilla
+    wants_json = request.accept_mimetypes.best_match(
+        ['text/html', 'application/json']
+    ) == 'application/json'
+
+    # lambda_stmt cachea el SQL compilado por combinación de filtros: los valores
+    # de los filtros viajan como parámetros y no se recompila en cada petición.
+    if wants_json:
+        # El JSON solo lleva columnas propias de Laptop: filas sin hidratar objetos
+        stmt = lambda_stmt(lambda: select(*LAPTOP_LIST_COLUMNS))
+    else:
+        # Query base: precargar las relaciones que usa la plantilla (evita N+1).
+        # Los catálogos (muchos-a-uno) van en el mismo SELECT con JOIN, sin multiplicar
+        # filas; solo la colección de imágenes necesita un segundo viaje (selectinload).
+        stmt = lambda_stmt(lambda: select(Laptop).options(
+            load_only(*LAPTOP_LIST_COLUMNS),
+            joinedload(Laptop.brand),
+            joinedload(Laptop.model),
+            joinedload(Laptop.processor),
+            joinedload(Laptop.graphics_card),
+            joinedload(Laptop.ram),
+            joinedload(Laptop.storage),
+            selectinload(Laptop.images)
+        ))
+
+        # En desarrollo, cualquier carga perezosa restante lanza error
+        if current_app.debug:
+            stmt += lambda s: s.options(raiseload('*'))
 
     # Busqueda por texto
     if search_query:
         search_pattern = f'%{search_query}%'
-        query = query.filter(
+        stmt += lambda s: s.where(
             or_(
                 Laptop.sku.ilike(search_pattern),
                 Laptop.display_name.ilike(search_pattern),
@@ -621,90 +1205,73 @@ def laptops_list():
             )
         )
 
-    # Aplicar filtros
+    # Aplicar filtros (los valores se calculan fuera de las lambdas)
     if store_filter and store_filter > 0:
-        query = query.filter(Laptop.store_id == store_filter)
+        stmt += lambda s: s.where(Laptop.store_id == store_filter)
 
     if brand_filter and brand_filter > 0:
-        query = query.filter(Laptop.brand_id == brand_filter)
+        stmt += lambda s: s.where(Laptop.brand_id == brand_filter)
 
     if category_filter:
-        query = query.filter(Laptop.category == category_filter)
+        stmt += lambda s: s.where(Laptop.category == category_filter)
 
     if processor_filter and processor_filter > 0:
-        query = query.filter(Laptop.processor_id == processor_filter)
+        stmt += lambda s: s.where(Laptop.processor_id == processor_filter)
 
     if gpu_filter and gpu_filter > 0:
-        query = query.filter(Laptop.graphics_card_id == gpu_filter)
+        stmt += lambda s: s.where(Laptop.graphics_card_id == gpu_filter)
 
     if screen_filter and screen_filter > 0:
-        query = query.filter(Laptop.screen_id == screen_filter)
+        stmt += lambda s: s.where(Laptop.screen_id == screen_filter)
 
     if condition_filter:
-        query = query.filter(Laptop.condition == condition_filter)
+        stmt += lambda s: s.where(Laptop.condition == condition_filter)
 
     if supplier_filter and supplier_filter > 0:
-        query = query.filter(Laptop.supplier_id == supplier_filter)
-
-    if is_published_filter:
-        query = query.filter(Laptop.is_published == (is_published_filter == '1'))
-
-    if is_featured_filter:
-        query = query.filter(Laptop.is_featured == (is_featured_filter == '1'))
-
-    if has_npu_filter:
-        query = query.filter(Laptop.npu == (has_npu_filter == '1'))
+        stmt += lambda s: s.where(Laptop.supplier_id == supplier_filter)
+
+    # Filtros booleanos (?is_published=1/0, ?is_featured=, ?has_npu=).
+    # Una lambda por filtro: lambda_stmt cachea por ubicación en el código, así
+    # que una lambda compartida dentro de un bucle reutilizaría el último valor
+    published_filter = request.args.get('is_published')
+    if published_filter:
+        is_published = published_filter == '1'
+        stmt += lambda s: s.where(Laptop.is_published == is_published)
+
+    featured_filter = request.args.get('is_featured')
+    if featured_filter:
+        is_featured = featured_filter == '1'
+        stmt += lambda s: s.where(Laptop.is_featured == is_featured)
+
+    npu_filter = request.args.get('has_npu')
+    if npu_filter:
+        has_npu = npu_filter == '1'
+        stmt += lambda s: s.where(Laptop.npu == has_npu)
 
     if min_price > 0:
-        query = query.filter(Laptop.sale_price >= min_price)
+        stmt += lambda s: s.where(Laptop.sale_price >= min_price)
 
     if max_price > 0:
-        query = query.filter(Laptop.sale_price <= max_price)
+        stmt += lambda s: s.where(Laptop.sale_price <= max_price)
 
-    # Ordenar por fecha de ingreso (mas recientes primero)
-    query = query.order_by(Laptop.entry_date.desc())
-
-    # Paginar
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Paginar por fecha de ingreso (mas recientes primero), sin OFFSET ni COUNT
+    pagination = paginate_keyset(stmt, per_page, rows_only=wants_json)
     laptops = pagination.items
 
-    # Calcular estadisticas GLOBALES (todas las laptops, no solo filtradas)
-    all_laptops = Laptop.query.all()
-
-    # VALOR TOTAL = suma del precio de venta * cantidad de TODAS las laptops
-    total_inventory_value = sum(
-        float(laptop.sale_price * laptop.quantity)
-        for laptop in all_laptops
-        if laptop.sale_price and laptop.quantity
-    )
-
-    # Contar laptops con stock bajo
-    low_stock_count = len([l for l in all_laptops if l.is_low_stock])
-
-    # Contar publicadas y destacadas
-    published_count = len([l for l in all_laptops if l.is_published])
-    featured_count = len([l for l in all_laptops if l.is_featured])
+    if wants_json:
+        return jsonify({
+            'data': [serialize_list_item(laptop) for laptop in laptops],
+            'next_cursor': pagination.next_cursor,
+            'prev_cursor': pagination.prev_cursor,
+            'has_more': pagination.has_next
+        })
 
-    stats = {
-        'total': len(all_laptops),
-        'total_value': total_inventory_value,
-        'low_stock': low_stock_count,
-        'published': published_count,
-        'featured': featured_count
-    }
+    # Calcular estadisticas GLOBALES (todas las laptops, no solo filtradas)
+    stats, min_db_price, max_db_price = get_inventory_stats()
 
     # Formularios
     filter_form = FilterForm()
 
-    # Obtener rango de precios de la base de datos
-    price_range = db.session.query(
-        db.func.min(Laptop.sale_price),
-        db.func.max(Laptop.sale_price)
-    ).first()
-
-    min_db_price = float(price_range[0]) if price_range[0] else 0
-    max_db_price = float(price_range[1]) if price_range[1] else 10000
-
     return render_template(
         'inventory/laptops_list.html',
         laptops=laptops,
@@ -738,99 +1305,58 @@ def laptop_add():
             # Loggear opciones seleccionadas
             logger.info(f"🎨 Opciones de eliminación de fondo - Portada: {remove_bg_cover}, Todas: {remove_bg_all}")
 
-            # Procesar catalogos dinamicos (crear si son strings)
-            catalog_data = CatalogService.process_laptop_form_data({
-                'brand_id': form.brand_id.data,
-                'model_id': form.model_id.data,
-                'processor_id': form.processor_id.data,
-                'os_id': form.os_id.data,
-                'screen_id': form.screen_id.data,
-                'graphics_card_id': form.graphics_card_id.data,
-                'storage_id': form.storage_id.data,
-                'ram_id': form.ram_id.data,
-                'store_id': form.store_id.data,
-                'location_id': form.location_id.data,
-                'supplier_id': form.supplier_id.data
-            })
+            # Sin autoflush: las consultas de los servicios no vacían la sesión a medias;
+            # todo se escribe en los flush explícitos y en el commit final (una transacción)
+            with db.session.no_autoflush:
+                # Procesar catalogos dinamicos (crear si son strings)
+                catalog_data = CatalogService.process_laptop_form_data({
+                    field: getattr(form, field).data for field in LAPTOP_CATALOG_FIELDS
+                })
 
-            # Generar SKU automaticamente
-            sku = SKUService.generate_laptop_sku()
-
-            # Generar slug
-            base_slug = generate_slug(form.display_name.data)
-            slug = form.slug.data if form.slug.data else ensure_unique_slug(base_slug)
-
-            # Procesar puertos de conectividad
-            connectivity_ports = process_connectivity_ports(form.connectivity_ports.data)
-
-            # Crear nueva laptop
-            laptop = Laptop(
-                # Identificadores
-                sku=sku,
-                slug=slug,
-
-                # Marketing y SEO
-                display_name=form.display_name.data,
-                short_description=form.short_description.data,
-                long_description_html=form.long_description_html.data,
-                is_published=form.is_published.data,
-                is_featured=form.is_featured.data,
-                seo_title=form.seo_title.data,
-                seo_description=form.seo_description.data,
-
-                # Relaciones
-                brand_id=catalog_data['brand_id'],
-                model_id=catalog_data['model_id'],
-                processor_id=catalog_data['processor_id'],
-                os_id=catalog_data['os_id'],
-                screen_id=catalog_data['screen_id'],
-                graphics_card_id=catalog_data['graphics_card_id'],
-                storage_id=catalog_data['storage_id'],
-                ram_id=catalog_data['ram_id'],
-                store_id=catalog_data['store_id'],
-                location_id=catalog_data.get('location_id'),
-                supplier_id=catalog_data.get('supplier_id'),
-
-                # Detalles tecnicos
-                npu=form.npu.data,
-                storage_upgradeable=form.storage_upgradeable.data,
-                ram_upgradeable=form.ram_upgradeable.data,
-                keyboard_layout=form.keyboard_layout.data,
-                connectivity_ports=connectivity_ports,
-
-                # Estado y categoria
-                category=form.category.data,
-                condition=form.condition.data,
-
-                # Financieros
-                purchase_cost=form.purchase_cost.data,
-                sale_price=form.sale_price.data,
-                discount_price=form.discount_price.data if form.discount_price.data else None,
-                tax_percent=form.tax_percent.data if form.tax_percent.data else 0,
-
-                # Inventario
-                quantity=form.quantity.data,
-                reserved_quantity=form.reserved_quantity.data if form.reserved_quantity.data else 0,
-                min_alert=form.min_alert.data,
-
-                # Timestamps
-                entry_date=date.today(),
-                sale_date=None,
-                internal_notes=form.internal_notes.data,
-
-                # Auditoria
-                created_by_id=current_user.id
-            )
+                # Generar SKU automaticamente
+                sku = SKUService.generate_laptop_sku()
 
-            # Guardar en base de datos
-            db.session.add(laptop)
-            db.session.flush()  # Para obtener el ID
+                # Generar slug
+                base_slug = generate_slug(form.display_name.data)
+                slug = form.slug.data if form.slug.data else ensure_unique_slug(base_slug)
 
-            # Procesar imágenes CON eliminación de fondo
-            img_success, img_errors, bg_processed, bg_errors = process_laptop_images(
-                laptop, form, remove_bg_cover=remove_bg_cover, remove_bg_all=remove_bg_all
-            )
+                # Procesar puertos de conectividad
+                connectivity_ports = process_connectivity_ports(form.connectivity_ports.data)
+
+                # Crear nueva laptop
+                laptop = Laptop(
+                    # Identificadores
+                    sku=sku,
+                    slug=slug,
+
+                    # Marketing, detalles tecnicos, financieros e inventario
+                    **laptop_form_values(form),
+
+                    # Relaciones
+                    **catalog_data,
+                    connectivity_ports=connectivity_ports,
+
+                    # Timestamps
+                    entry_date=date.today(),
+                    sale_date=None,
+
+                    # Auditoria
+                    created_by_id=current_user.id
+                )
+
+                # Guardar en base de datos
+                db.session.add(laptop)
+                db.session.flush()  # Para obtener el ID
+
+                # Procesar imágenes CON eliminación de fondo
+                img_success, img_errors, bg_jobs, bg_errors = process_laptop_images(
+                    laptop, form, remove_bg_cover=remove_bg_cover, remove_bg_all=remove_bg_all
+                )
             db.session.commit()
+            invalidate_inventory_caches()
+
+            # Eliminación de fondo fuera del hilo de la petición
+            bg_queued = enqueue_background_removal(laptop.id, bg_jobs)
 
             # Mensaje de éxito
             if img_success > 0:
@@ -839,16 +1365,14 @@ def laptop_add():
                 flash(f'✅ Laptop {sku} agregada exitosamente', 'success')
 
             # Mostrar resultados de eliminación de fondo
-            if bg_processed > 0:
-                flash(f'🎨 Fondo eliminado de {bg_processed} imagen(es)', 'success')
-
-            # Mostrar errores de imágenes si los hay
-            for error in img_errors:
-                flash(f'⚠️ {error}', 'warning')
+            if bg_queued > 0:
+                flash(f'🎨 Eliminando fondo de {bg_queued} imagen(es) en segundo plano', 'info')
 
-            # Mostrar errores de eliminación de fondo si los hay
-            for error in bg_errors:
-                flash(f'🎨 {error}', 'warning')
+            # Mostrar errores de imágenes y de eliminación de fondo (un mensaje cada uno)
+            if img_errors:
+                flash('⚠️ ' + '; '.join(img_errors), 'warning')
+            if bg_errors:
+                flash('🎨 ' + '; '.join(bg_errors), 'warning')
 
             return redirect(url_for('inventory.laptop_detail', id=laptop.id))
 
@@ -858,10 +1382,7 @@ def laptop_add():
             flash(f'❌ Error al agregar laptop: {str(e)}', 'error')
 
     # Si hay errores en el formulario
-    if form.errors:
-        for field, errors in form.errors.items():
-            for error in errors:
-                flash(f'Error en {field}: {error}', 'error')
+    flash_form_errors(form)
 
     # Pasar información sobre disponibilidad de eliminación de fondo al template
     remove_bg_available = background_service.is_available()
@@ -880,28 +1401,30 @@ def laptop_detail(id):
     Muestra el detalle completo de una laptop
     CON INFORMACIÓN SOBRE ELIMINACIÓN DE FONDO
     """
-    laptop = Laptop.query.get_or_404(id)
+    # El template muestra todas las especificaciones: cargarlas en la misma consulta
+    laptop = Laptop.query.options(
+        load_only(*LAPTOP_DETAIL_COLUMNS),
+        *detail_load_options()
+    ).get_or_404(id)
 
     # Obtener laptops similares (misma categoria y marca)
-    similar_laptops = Laptop.query.filter(
-        Laptop.category == laptop.category,
-        Laptop.brand_id == laptop.brand_id,
-        Laptop.id != laptop.id,
-        Laptop.is_published == True
-    ).limit(5).all()
+    similar_laptops = get_similar_laptops(laptop)
 
     # CORRECCIÓN: Obtener imágenes ordenadas usando sorted() en lugar de order_by()
     # ¡laptop.images es una lista, no un objeto Query!
     images = sorted(laptop.images, key=lambda img: img.ordering)
 
-    # Imagen de portada
-    cover_image = next((img for img in laptop.images if img.is_cover), None)
+    # Imagen de portada (de la lista ya cargada; si no hay marcada, la primera)
+    cover_image = next((img for img in images if img.is_cover), images[0] if images else None)
+
+    # Verificar si el servicio de eliminación de fondo está disponible
+    remove_bg_available = background_service.is_available()
 
     # Obtener información detallada de cada imagen (para mostrar estado de fondo eliminado)
     images_info = []
     for img in images:
-        img_path = os.path.join('app', 'static', img.image_path)
-        info = background_service.get_image_info(img_path) if background_service.is_available() else {}
+        img_path = static_path(img.image_path)
+        info = background_service.get_image_info(img_path) if remove_bg_available else {}
         images_info.append({
             'image': img,
             'info': info,
@@ -909,9 +1432,6 @@ def laptop_detail(id):
             'backups': info.get('backups', [])
         })
 
-    # Verificar si el servicio de eliminación de fondo está disponible
-    remove_bg_available = background_service.is_available()
-
     return render_template(
         'inventory/laptop_detail.html',
         laptop=laptop,
@@ -931,19 +1451,16 @@ def laptop_by_slug(slug):
     """
     Muestra el detalle de una laptop por su slug (URL publica)
     """
-    laptop = Laptop.query.filter_by(slug=slug, is_published=True).first_or_404()
+    laptop = Laptop.query.options(*detail_load_options()).filter_by(
+        slug=slug, is_published=True
+    ).first_or_404()
 
     # Obtener laptops similares
-    similar_laptops = Laptop.query.filter(
-        Laptop.category == laptop.category,
-        Laptop.brand_id == laptop.brand_id,
-        Laptop.id != laptop.id,
-        Laptop.is_published == True
-    ).limit(5).all()
+    similar_laptops = get_similar_laptops(laptop)
 
     # CORRECCIÓN: Obtener imágenes ordenadas usando sorted() en lugar de order_by()
     images = sorted(laptop.images, key=lambda img: img.ordering)
-    cover_image = next((img for img in laptop.images if img.is_cover), None)
+    cover_image = next((img for img in images if img.is_cover), images[0] if images else None)
 
     return render_template(
         'inventory/laptop_public.html',
@@ -964,7 +1481,7 @@ def laptop_edit(id):
     Edita una laptop existente
     CON SOPORTE PARA ELIMINACIÓN DE FONDO
     """
-    laptop = Laptop.query.get_or_404(id)
+    laptop = db.get_or_404(Laptop, id)
     form = LaptopForm(obj=laptop)
 
     # Pre-poblar connectivity_ports si existe
@@ -980,86 +1497,44 @@ def laptop_edit(id):
             # Loggear opciones seleccionadas
             logger.info(f"🎨 Opciones de eliminación de fondo - Portada: {remove_bg_cover}, Todas: {remove_bg_all}")
 
-            # Procesar catalogos dinamicos
-            catalog_data = CatalogService.process_laptop_form_data({
-                'brand_id': form.brand_id.data,
-                'model_id': form.model_id.data,
-                'processor_id': form.processor_id.data,
-                'os_id': form.os_id.data,
-                'screen_id': form.screen_id.data,
-                'graphics_card_id': form.graphics_card_id.data,
-                'storage_id': form.storage_id.data,
-                'ram_id': form.ram_id.data,
-                'store_id': form.store_id.data,
-                'location_id': form.location_id.data,
-                'supplier_id': form.supplier_id.data
-            })
+            # Sin autoflush: las consultas de los servicios no vacían la sesión a medias;
+            # todo se escribe en los flush explícitos y en el commit final (una transacción)
+            with db.session.no_autoflush:
+                # Procesar catalogos dinamicos
+                catalog_data = CatalogService.process_laptop_form_data({
+                    field: getattr(form, field).data for field in LAPTOP_CATALOG_FIELDS
+                })
 
-            # Actualizar slug si cambio el nombre
-            if form.slug.data:
-                laptop.slug = ensure_unique_slug(form.slug.data, laptop.id)
-            elif form.display_name.data != laptop.display_name:
-                base_slug = generate_slug(form.display_name.data)
-                laptop.slug = ensure_unique_slug(base_slug, laptop.id)
-
-            # Procesar puertos de conectividad
-            connectivity_ports = process_connectivity_ports(form.connectivity_ports.data)
-
-            # Actualizar campos
-            # Marketing y SEO
-            laptop.display_name = form.display_name.data
-            laptop.short_description = form.short_description.data
-            laptop.long_description_html = form.long_description_html.data
-            laptop.is_published = form.is_published.data
-            laptop.is_featured = form.is_featured.data
-            laptop.seo_title = form.seo_title.data
-            laptop.seo_description = form.seo_description.data
-
-            # Relaciones
-            laptop.brand_id = catalog_data['brand_id']
-            laptop.model_id = catalog_data['model_id']
-            laptop.processor_id = catalog_data['processor_id']
-            laptop.os_id = catalog_data['os_id']
-            laptop.screen_id = catalog_data['screen_id']
-            laptop.graphics_card_id = catalog_data['graphics_card_id']
-            laptop.storage_id = catalog_data['storage_id']
-            laptop.ram_id = catalog_data['ram_id']
-            laptop.store_id = catalog_data['store_id']
-            laptop.location_id = catalog_data.get('location_id')
-            laptop.supplier_id = catalog_data.get('supplier_id')
-
-            # Detalles tecnicos
-            laptop.npu = form.npu.data
-            laptop.storage_upgradeable = form.storage_upgradeable.data
-            laptop.ram_upgradeable = form.ram_upgradeable.data
-            laptop.keyboard_layout = form.keyboard_layout.data
-            laptop.connectivity_ports = connectivity_ports
-
-            # Estado y categoria
-            laptop.category = form.category.data
-            laptop.condition = form.condition.data
-
-            # Financieros
-            laptop.purchase_cost = form.purchase_cost.data
-            laptop.sale_price = form.sale_price.data
-            laptop.discount_price = form.discount_price.data if form.discount_price.data else None
-            laptop.tax_percent = form.tax_percent.data if form.tax_percent.data else 0
-
-            # Inventario
-            laptop.quantity = form.quantity.data
-            laptop.reserved_quantity = form.reserved_quantity.data if form.reserved_quantity.data else 0
-            laptop.min_alert = form.min_alert.data
-
-            # Notas
-            laptop.internal_notes = form.internal_notes.data
-
-            laptop.updated_at = datetime.utcnow()
-
-            # Procesar imágenes CON eliminación de fondo
-            img_success, img_errors, bg_processed, bg_errors = process_laptop_images(
-                laptop, form, remove_bg_cover=remove_bg_cover, remove_bg_all=remove_bg_all
-            )
+                # Actualizar slug si cambio el nombre
+                # (el slug actual ya es único: sin consulta si no cambió)
+                if form.slug.data:
+                    if form.slug.data != laptop.slug:
+                        laptop.slug = ensure_unique_slug(form.slug.data, laptop.id)
+                elif form.display_name.data != laptop.display_name:
+                    base_slug = generate_slug(form.display_name.data)
+                    laptop.slug = ensure_unique_slug(base_slug, laptop.id)
+
+                # Procesar puertos de conectividad
+                connectivity_ports = process_connectivity_ports(form.connectivity_ports.data)
+
+                # Actualizar campos: solo se asignan los que cambiaron
+                values = laptop_form_values(form)
+                values.update(catalog_data)
+                values['connectivity_ports'] = connectivity_ports
+
+                for field, value in values.items():
+                    if getattr(laptop, field) != value:
+                        setattr(laptop, field, value)
+
+                # Procesar imágenes CON eliminación de fondo
+                img_success, img_errors, bg_jobs, bg_errors = process_laptop_images(
+                    laptop, form, remove_bg_cover=remove_bg_cover, remove_bg_all=remove_bg_all
+                )
             db.session.commit()
+            invalidate_inventory_caches()
+
+            # Eliminación de fondo fuera del hilo de la petición
+            bg_queued = enqueue_background_removal(laptop.id, bg_jobs)
 
             # Mensaje de éxito
             if img_success > 0:
@@ -1068,16 +1543,14 @@ def laptop_edit(id):
                 flash(f'✅ Laptop {laptop.sku} actualizada exitosamente', 'success')
 
             # Mostrar resultados de eliminación de fondo
-            if bg_processed > 0:
-                flash(f'🎨 Fondo eliminado de {bg_processed} imagen(es)', 'success')
-
-            # Mostrar errores de imágenes si los hay
-            for error in img_errors:
-                flash(f'⚠️ {error}', 'warning')
+            if bg_queued > 0:
+                flash(f'🎨 Eliminando fondo de {bg_queued} imagen(es) en segundo plano', 'info')
 
-            # Mostrar errores de eliminación de fondo si los hay
-            for error in bg_errors:
-                flash(f'🎨 {error}', 'warning')
+            # Mostrar errores de imágenes y de eliminación de fondo (un mensaje cada uno)
+            if img_errors:
+                flash('⚠️ ' + '; '.join(img_errors), 'warning')
+            if bg_errors:
+                flash('🎨 ' + '; '.join(bg_errors), 'warning')
 
             return redirect(url_for('inventory.laptop_detail', id=laptop.id))
 
@@ -1087,10 +1560,7 @@ def laptop_edit(id):
             flash(f'❌ Error al actualizar laptop: {str(e)}', 'error')
 
     # Si hay errores en el formulario
-    if form.errors:
-        for field, errors in form.errors.items():
-            for error in errors:
-                flash(f'Error en {field}: {error}', 'error')
+    flash_form_errors(form)
 
     # CORRECCIÓN: Obtener imágenes ordenadas usando sorted() en lugar de order_by()
     images_list = sorted(laptop.images, key=lambda img: img.ordering)
@@ -1115,81 +1585,88 @@ def laptop_edit(id):
 def laptop_delete(id):
     """
     Elimina una laptop del inventario
-    """
-    laptop = Laptop.query.get_or_404(id)
 
+    Un único DELETE ... RETURNING (sin SELECT previo). Las filas de laptop_images
+    se eliminan por el ON DELETE CASCADE de la base de datos.
+    """
     try:
-        # Obtener y eliminar imágenes asociadas
-        images = laptop.images.all()
-
-        # Eliminar archivos de imágenes del sistema de archivos
-        for image in images:
-            try:
-                filepath = os.path.join('app', 'static', image.image_path)
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                    logger.info(f'Laptop {laptop.sku}: Imagen eliminada {image.image_path}')
-            except Exception as e:
-                logger.error(f'Error al eliminar imagen {image.image_path}: {str(e)}')
-
-        # Eliminar directorio de imágenes si existe
-        image_folder = os.path.join('app', 'static', 'uploads', 'laptops', str(laptop.id))
-        if os.path.exists(image_folder):
-            try:
-                # Eliminar todos los archivos en el directorio
-                for filename in os.listdir(image_folder):
-                    file_path = os.path.join(image_folder, filename)
-                    try:
-                        if os.path.isfile(file_path):
-                            os.unlink(file_path)
-                    except Exception as e:
-                        logger.error(f'Error al eliminar {file_path}: {str(e)}')
-
-                # Eliminar el directorio vacío
-                os.rmdir(image_folder)
-                logger.info(f'Laptop {laptop.sku}: Directorio de imágenes eliminado')
-            except Exception as e:
-                logger.error(f'Error al eliminar directorio de imágenes: {str(e)}')
-
-        # Eliminar la laptop de la base de datos
-        db.session.delete(laptop)
+        row = db.session.execute(
+            delete(Laptop).where(Laptop.id == id).returning(Laptop.sku)
+        ).one_or_none()
         db.session.commit()
 
-        flash(f'✅ Laptop {laptop.sku} eliminada exitosamente', 'success')
-        return redirect(url_for('inventory.laptops_list'))
-
     except Exception as e:
         db.session.rollback()
-        logger.error(f'Error al eliminar laptop {laptop.sku}: {str(e)}', exc_info=True)
+        logger.error(f'Error al eliminar laptop {id}: {str(e)}', exc_info=True)
         flash(f'❌ Error al eliminar laptop: {str(e)}', 'error')
         return redirect(url_for('inventory.laptop_detail', id=id))
 
+    if row is None:
+        abort(404)
+
+    invalidate_inventory_caches()
+
+    # Eliminar archivos de imágenes solo después de confirmar el borrado en BD
+    image_folder = os.path.join(UPLOAD_ROOT, str(id))
+    laptop_upload_dir.cache_clear()
+    if os.path.exists(image_folder):
+        # Recursivo: también se llevan backups y resultados de eliminación de fondo
+        shutil.rmtree(
+            image_folder,
+            onerror=lambda func, path, exc_info: logger.error(
+                f'Error al eliminar {path}: {exc_info[1]}'
+            )
+        )
+        logger.info(f'Laptop {row.sku}: Directorio de imágenes eliminado')
+
+    flash(f'✅ Laptop {row.sku} eliminada exitosamente', 'success')
+    return redirect(url_for('inventory.laptops_list'))
+
 
 # ===== DUPLICAR LAPTOP =====
 
 @inventory_bp.route('/<int:id>/duplicate', methods=['POST'])
 @login_required
 def laptop_duplicate(id):
-    original = Laptop.query.get_or_404(id)
-
-    duplicate = Laptop(
-        sku=f"{original.sku}-COPY",
-        display_name=f"{original.display_name} (Copia)",
-        short_description=original.short_description,
-        long_description_html=original.long_description_html,
-        category=original.category,
-        brand_id=original.brand_id,
-        model_id=original.model_id,
-        processor_id=original.processor_id,
-        ram_id=original.ram_id,
-        storage_id=original.storage_id,
-        sale_price=original.sale_price,
-        is_published=False,
-        created_by_id=current_user.id
-    )
+    """
+    Duplica una laptop con INSERT ... SELECT (sin copiar campo por campo en Python)
+    La copia queda sin publicar, con SKU y slug nuevos
+    """
+    original = Laptop.query.with_entities(Laptop.slug).filter_by(id=id).first_or_404()
+
+    # created_at/updated_at se omiten: from_select aplica sus defaults
+    table = Laptop.__table__
+    columns = [
+        c for c in table.columns
+        if c.name not in ('id', 'created_at', 'updated_at')
+    ]
+
+    # Valores que cambian respecto al original; el resto se copia tal cual en SQL
+    overrides = {
+        'sku': literal(SKUService.generate_laptop_sku()),
+        'slug': literal(ensure_unique_slug(f"{original.slug}-copia")),
+        'display_name': table.c.display_name + ' (Copia)',
+        'is_published': literal(False),
+        'is_featured': literal(False),
+        # Una unidad nueva, como la copia ORM anterior: no suma el stock del original
+        'quantity': literal(1),
+        'reserved_quantity': literal(0),
+        # Las notas internas son de la unidad concreta, no del modelo
+        'internal_notes': literal(None, type_=table.c.internal_notes.type),
+        'entry_date': literal(date.today()),
+        'sale_date': literal(None, type_=table.c.sale_date.type),
+        'created_by_id': literal(current_user.id)
+    }
+
+    new_id = db.session.execute(
+        insert(table).from_select(
+            [c.name for c in columns],
+            select(*[overrides.get(c.name, c) for c in columns]).where(table.c.id == id)
+        ).returning(table.c.id)
+    ).scalar()
 
-    db.session.add(duplicate)
     db.session.commit()
+    invalidate_inventory_caches()
 
     flash('Laptop duplicada correctamente', 'success')
-    return redirect(url_for('inventory.laptop_edit', id=duplicate.id))
\ No newline at end of file
+    return redirect(url_for('inventory.laptop_edit', id=new_id))
@@ -3,7 +3,7 @@
 # ============================================
 # Dashboard avanzado compatible con tus modelos exactos
 
-from flask import Blueprint, render_template, jsonify, request, redirect, url_for, abort
+from flask import Blueprint, render_template, jsonify, request, redirect, url_for, abort, flash
 from flask_login import login_required, current_user
 from app import db
 from app.models.laptop import Laptop, Brand
@@ -125,38 +125,28 @@ def dashboard():
 
     # ===== 1. MÉTRICAS DE INVENTARIO =====
 
-    # Total de laptops
-    total_laptops = Laptop.query.count()
-
-    # Disponibles (con quantity > 0)
-    total_available = db.session.query(
-        func.count(Laptop.id)
-    ).filter(Laptop.quantity > 0).scalar() or 0
-
-    # Laptops con stock bajo (quantity <= min_alert)
-    low_stock_laptops = Laptop.query.filter(
-        Laptop.quantity <= Laptop.min_alert,
-        Laptop.quantity > 0
-    ).all()
-    low_stock_count = len(low_stock_laptops)
-
-    # Sin stock
-    out_of_stock_count = Laptop.query.filter_by(quantity=0).count()
-
-    # Reservados
-    total_reserved = db.session.query(
-        func.sum(Laptop.reserved_quantity)
-    ).scalar() or 0
-
-    # Valor del inventario (costo)
-    inventory_cost = db.session.query(
-        func.sum(Laptop.quantity * Laptop.purchase_cost)
-    ).scalar() or 0
-
-    # Valor del inventario (precio de venta)
-    inventory_value = db.session.query(
-        func.sum(Laptop.quantity * Laptop.sale_price)
-    ).scalar() or 0
+    # Una sola consulta agregada: sin materializar filas para contarlas
+    inventory = db.session.query(
+        func.count(Laptop.id).label('total'),
+        func.coalesce(func.sum(case((Laptop.quantity > 0, 1), else_=0)), 0).label('available'),
+        # Laptops con stock bajo (0 < quantity <= min_alert)
+        func.coalesce(func.sum(case(
+            (and_(Laptop.quantity <= Laptop.min_alert, Laptop.quantity > 0), 1), else_=0
+        )), 0).label('low_stock'),
+        func.coalesce(func.sum(case((Laptop.quantity == 0, 1), else_=0)), 0).label('out_of_stock'),
+        func.coalesce(func.sum(Laptop.reserved_quantity), 0).label('reserved'),
+        # Valor del inventario (costo y precio de venta)
+        func.coalesce(func.sum(Laptop.quantity * Laptop.purchase_cost), 0).label('cost'),
+        func.coalesce(func.sum(Laptop.quantity * Laptop.sale_price), 0).label('value')
+    ).one()
+
+    total_laptops = inventory.total
+    total_available = int(inventory.available)
+    low_stock_count = int(inventory.low_stock)
+    out_of_stock_count = int(inventory.out_of_stock)
+    total_reserved = inventory.reserved
+    inventory_cost = inventory.cost
+    inventory_value = inventory.value
 
     # Ganancia potencial
     potential_profit = float(inventory_value) - float(inventory_cost)
@@ -783,6 +773,13 @@ def register_error_handlers(app):
         """Error 403: Acceso prohibido"""
         return render_template('errors/403.html'), 403
 
+    @app.errorhandler(413)
+    def request_entity_too_large(error):
+        """Error 413: Petición mayor que MAX_CONTENT_LENGTH"""
+        limit_mb = app.config['MAX_CONTENT_LENGTH'] / 1024 / 1024
+        flash(f'La petición supera el tamaño máximo permitido ({limit_mb:.0f}MB).', 'error')
+        return redirect(request.referrer or url_for('main.dashboard'))
+
     @app.errorhandler(404)
     def page_not_found(error):
         """Error 404: Página no encontrada"""
@@ -2,6 +2,8 @@
 Servicio para manejar la creación dinámica de catálogos
 Actualizado al nuevo modelo de datos
 """
+import time
+from sqlalchemy import select, literal, union_all, func
 from app import db
 from app.models.laptop import (
     Brand, LaptopModel, Processor, OperatingSystem,
@@ -9,9 +11,110 @@ from app.models.laptop import (
 )
 
 
+# Catálogos simples (solo nombre) que se resuelven en lote desde el formulario
+SIMPLE_CATALOG_FIELDS = {
+    'brand_id': Brand,
+    'processor_id': Processor,
+    'os_id': OperatingSystem,
+    'screen_id': Screen,
+    'graphics_card_id': GraphicsCard,
+    'storage_id': Storage,
+    'ram_id': Ram,
+    'store_id': Store,
+    'supplier_id': Supplier
+}
+
+
+# Caché en proceso de opciones (id, nombre) para los selectores de formularios
+CATALOG_CHOICES_TTL = 300  # segundos
+_CHOICES_CACHE = {}  # {modelo: (timestamp, [(id, name), ...])}
+
+
 class CatalogService:
     """Servicio para gestión dinámica de catálogos"""
 
+    @staticmethod
+    def get_active_choices(model):
+        """
+        Opciones (id, nombre) de los items activos de un catálogo, ordenadas por nombre
+
+        Cacheadas en memoria CATALOG_CHOICES_TTL segundos; se invalidan al crear,
+        desactivar, reactivar o fusionar items desde este servicio.
+
+        Args:
+            model: Modelo de catálogo (Brand, Processor, ...)
+
+        Returns:
+            list: [(id, name), ...]
+        """
+        cached = _CHOICES_CACHE.get(model)
+        if cached and time.time() - cached[0] < CATALOG_CHOICES_TTL:
+            return cached[1]
+
+        choices = [
+            (row.id, row.name)
+            for row in db.session.query(model.id, model.name).filter(
+                model.is_active == True
+            ).order_by(model.name)
+        ]
+        _CHOICES_CACHE[model] = (time.time(), choices)
+        return choices
+
+    @staticmethod
+    def invalidate_choices():
+        """Vacía la caché de opciones de catálogos"""
+        _CHOICES_CACHE.clear()
+
+    @staticmethod
+    def _new_name(value):
+        """Devuelve el nombre limpio si value es un valor nuevo (str), o None"""
+        if isinstance(value, str) and value.strip() and value.strip() != '0':
+            return value.strip()
+        return None
+
+    @staticmethod
+    def _resolve_names_batch(pending):
+        """
+        Resuelve varios nombres de catálogo en un solo viaje a la base de datos
+
+        Busca todos los nombres con un UNION ALL (case-insensitive) y crea
+        los que falten con un único flush.
+
+        Args:
+            pending: {campo: (modelo, nombre)}
+
+        Returns:
+            dict: {campo: id}
+        """
+        if not pending:
+            return {}
+
+        lookups = [
+            select(literal(field).label('field'), model.id.label('id')).where(
+                func.lower(model.name) == name.lower()
+            )
+            for field, (model, name) in pending.items()
+        ]
+        stmt = lookups[0] if len(lookups) == 1 else union_all(*lookups)
+
+        resolved = {}
+        for row in db.session.execute(stmt):
+            resolved.setdefault(row.field, row.id)
+
+        # Crear los que no existen (un solo flush para todos)
+        new_items = {
+            field: model(name=name, is_active=True)
+            for field, (model, name) in pending.items()
+            if field not in resolved
+        }
+        if new_items:
+            db.session.add_all(new_items.values())
+            db.session.flush()
+            CatalogService.invalidate_choices()
+            resolved.update({field: item.id for field, item in new_items.items()})
+
+        return resolved
+
     @staticmethod
     def _get_or_create_generic(model, value, **extra_fields):
         """
@@ -51,6 +154,7 @@ class CatalogService:
             new_item = model(name=name, is_active=True, **extra_fields)
             db.session.add(new_item)
             db.session.flush()  # Para obtener el ID sin commit
+            CatalogService.invalidate_choices()
             return new_item.id
 
         return None
@@ -111,6 +215,7 @@ class CatalogService:
             new_model = LaptopModel(name=name, brand_id=brand_id, is_active=True)
             db.session.add(new_model)
             db.session.flush()
+            CatalogService.invalidate_choices()
             return new_model.id
 
         return None
@@ -249,6 +354,7 @@ class CatalogService:
             new_location = Location(name=name, store_id=store_id, is_active=True)
             db.session.add(new_location)
             db.session.flush()
+            CatalogService.invalidate_choices()
             return new_location.id
 
         return None
@@ -279,57 +385,30 @@ class CatalogService:
             dict: Diccionario con los IDs procesados
         """
         processed_data = {}
+        pending = {}
 
-        # Procesar marca primero (se necesita para el modelo)
-        brand_id = CatalogService.get_or_create_brand(form_data.get('brand_id'))
-        processed_data['brand_id'] = brand_id
-
-        # Procesar modelo (puede necesitar brand_id)
-        model_id = CatalogService.get_or_create_model(
-            form_data.get('model_id'),
-            brand_id
-        )
-        processed_data['model_id'] = model_id
-
-        # Procesar otros catálogos de especificaciones
-        processed_data['processor_id'] = CatalogService.get_or_create_processor(
-            form_data.get('processor_id')
-        )
-
-        processed_data['os_id'] = CatalogService.get_or_create_os(
-            form_data.get('os_id')
-        )
-
-        processed_data['screen_id'] = CatalogService.get_or_create_screen(
-            form_data.get('screen_id')
-        )
+        # Catálogos simples: los IDs pasan directo, los nombres nuevos se resuelven en lote
+        for field, model in SIMPLE_CATALOG_FIELDS.items():
+            value = form_data.get(field)
+            name = CatalogService._new_name(value)
 
-        processed_data['graphics_card_id'] = CatalogService.get_or_create_graphics_card(
-            form_data.get('graphics_card_id')
-        )
+            if name:
+                pending[field] = (model, name)
+            else:
+                processed_data[field] = CatalogService._get_or_create_generic(model, value)
 
-        processed_data['storage_id'] = CatalogService.get_or_create_storage(
-            form_data.get('storage_id')
-        )
+        processed_data.update(CatalogService._resolve_names_batch(pending))
 
-        processed_data['ram_id'] = CatalogService.get_or_create_ram(
-            form_data.get('ram_id')
+        # Procesar modelo (necesita brand_id ya resuelto)
+        processed_data['model_id'] = CatalogService.get_or_create_model(
+            form_data.get('model_id'),
+            processed_data.get('brand_id')
         )
 
-        # Procesar tienda primero (se necesita para ubicación)
-        store_id = CatalogService.get_or_create_store(form_data.get('store_id'))
-        processed_data['store_id'] = store_id
-
-        # Procesar ubicación (puede necesitar store_id)
-        location_id = CatalogService.get_or_create_location(
+        # Procesar ubicación (necesita store_id ya resuelto)
+        processed_data['location_id'] = CatalogService.get_or_create_location(
             form_data.get('location_id'),
-            store_id
-        )
-        processed_data['location_id'] = location_id
-
-        # Procesar proveedor
-        processed_data['supplier_id'] = CatalogService.get_or_create_supplier(
-            form_data.get('supplier_id')
+            processed_data.get('store_id')
         )
 
         return processed_data
@@ -372,6 +451,7 @@ class CatalogService:
         if item:
             item.is_active = False
             db.session.commit()
+            CatalogService.invalidate_choices()
             return True
         return False
 
@@ -391,6 +471,7 @@ class CatalogService:
         if item:
             item.is_active = True
             db.session.commit()
+            CatalogService.invalidate_choices()
             return True
         return False
 
@@ -445,5 +526,6 @@ class CatalogService:
         # Desactivar el source
         source.is_active = False
         db.session.commit()
+        CatalogService.invalidate_choices()
 
         return updated_count
\ No newline at end of file
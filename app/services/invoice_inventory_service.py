@@ -109,8 +109,7 @@ class InvoiceInventoryService:
                     else:
                         return False, f'Acción no válida: {action}'
 
-                    # Actualizar timestamps
-                    laptop.updated_at = datetime.utcnow()
+                    # updated_at lo fija la BD en el UPDATE (onupdate de TimestampMixin)
                     db.session.add(laptop)
 
                     # Registrar movimiento de inventario
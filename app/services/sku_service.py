@@ -4,10 +4,14 @@
 # Responsabilidad única: generar SKUs únicos
 # Actualizado al nuevo modelo de datos
 
-from datetime import datetime
+from datetime import datetime, timezone
+from sqlalchemy import func, select
 from app import db
 import re
 
+# Clave del advisory lock que serializa la asignación de SKUs en PostgreSQL
+SKU_LOCK_KEY = 'laptop_sku'
+
 
 class SKUService:
     """Servicio para generar SKUs únicos"""
@@ -19,6 +23,11 @@ class SKUService:
         Formato: LX-YYYYMMDD-XXXX
         Ejemplo: LX-20250101-0001
 
+        En PostgreSQL toma antes un advisory lock de transacción: dos altas
+        simultáneas no pueden leer el mismo último SKU. El lock se libera solo
+        con el commit/rollback de quien llama, así que el SKU queda protegido
+        hasta que la fila se inserta.
+
         Args:
             prefix: Prefijo del SKU (default: 'LX')
 
@@ -28,19 +37,19 @@ class SKUService:
         from app.models.laptop import Laptop
 
         # Obtener fecha actual
-        date_str = datetime.utcnow().strftime('%Y%m%d')
+        date_str = datetime.now(timezone.utc).strftime('%Y%m%d')
 
-        # Buscar el último SKU del día
-        last_laptop = Laptop.query.filter(
+        # Serializar asignaciones concurrentes (SQLite de tests no lo necesita)
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(SKU_LOCK_KEY))))
+
+        # Buscar el último SKU del día (solo la columna sku)
+        last_sku = db.session.query(Laptop.sku).filter(
             Laptop.sku.like(f'{prefix}-{date_str}-%')
-        ).order_by(Laptop.sku.desc()).first()
+        ).order_by(Laptop.sku.desc()).limit(1).scalar()
 
-        if last_laptop:
-            # Extraer el número secuencial y sumar 1
-            last_number = int(last_laptop.sku.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
+        # Extraer el número secuencial y sumar 1
+        new_number = int(last_sku.split('-')[-1]) + 1 if last_sku else 1
 
         # Formatear con 4 dígitos
         return f'{prefix}-{date_str}-{new_number:04d}'
@@ -62,7 +71,7 @@ class SKUService:
         """
         from app.models.laptop import Laptop
 
-        date_str = datetime.utcnow().strftime('%Y%m%d')
+        date_str = datetime.now(timezone.utc).strftime('%Y%m%d')
 
         if category_code:
             pattern = f'{prefix}-{category_code}-{date_str}-%'
@@ -187,7 +196,7 @@ class SKUService:
         from app.models.laptop import Laptop
 
         if date_str is None:
-            date_str = datetime.utcnow().strftime('%Y%m%d')
+            date_str = datetime.now(timezone.utc).strftime('%Y%m%d')
 
         if category_code:
             pattern = f'{prefix}-{category_code}-{date_str}-%'
@@ -268,6 +268,8 @@ def cache_response(timeout=300):
             # Esta función se ejecuta solo cada 60 segundos
             ...
 
+        get_stats.cache_clear()  # Invalidar manualmente
+
     Args:
         timeout: Tiempo en segundos para cachear
     """
@@ -295,6 +297,9 @@ def cache_response(timeout=300):
 
             return result
 
+        # Permite invalidar la caché manualmente tras una escritura
+        decorated_function.cache_clear = cache.clear
+
         return decorated_function
 
     return decorator
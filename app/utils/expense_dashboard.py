@@ -0,0 +1,82 @@
+# ============================================
+# CACHÉ POR PETICIÓN PARA EL DASHBOARD DE GASTOS
+# ============================================
+# Memoiza en flask.g los rangos de fechas y totales del mes para que
+# varios endpoints (o un endpoint compuesto) no repitan las mismas
+# consultas dentro de una misma petición.
+
+from datetime import date, timedelta
+from flask import g
+from sqlalchemy import func, case
+from app import db
+from app.models.expense import Expense
+
+
+def _dash_cache():
+    """Devuelve el diccionario de caché asociado a la petición actual"""
+    if not hasattr(g, '_dash_cache'):
+        g._dash_cache = {}
+    return g._dash_cache
+
+
+def get_month_range():
+    """
+    Calcula (una vez por petición) las fechas de referencia del mes actual
+
+    Returns:
+        dict: today, start_of_month, end_of_month, start_of_year,
+              prev_month_start, prev_month_end
+    """
+    cache = _dash_cache()
+    if 'month_range' in cache:
+        return cache['month_range']
+
+    today = date.today()
+    start_of_month = today.replace(day=1)
+    end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    prev_month_end = start_of_month - timedelta(days=1)
+
+    cache['month_range'] = {
+        'today': today,
+        'start_of_month': start_of_month,
+        'end_of_month': end_of_month,
+        'start_of_year': today.replace(month=1, day=1),
+        'prev_month_start': prev_month_end.replace(day=1),
+        'prev_month_end': prev_month_end
+    }
+    return cache['month_range']
+
+
+def get_user_month_totals(user_id):
+    """
+    Totales del mes actual de un usuario, cacheados por petición
+
+    Una sola consulta devuelve el total del mes (pagado o no) y el total pagado,
+    que usan tanto el resumen de tarjetas como la comparación mensual.
+
+    Returns:
+        dict: {'total': float, 'paid': float}
+    """
+    cache = _dash_cache()
+    key = ('month_totals', user_id)
+    if key in cache:
+        return cache[key]
+
+    month = get_month_range()
+
+    row = db.session.query(
+        func.coalesce(func.sum(Expense.amount), 0).label('total'),
+        func.coalesce(
+            func.sum(case((Expense.is_paid == True, Expense.amount), else_=0)), 0
+        ).label('paid')
+    ).filter(
+        Expense.created_by == user_id,
+        Expense.due_date >= month['start_of_month'],
+        Expense.due_date <= month['end_of_month']
+    ).one()
+
+    cache[key] = {
+        'total': float(row.total or 0),
+        'paid': float(row.paid or 0)
+    }
+    return cache[key]
@@ -0,0 +1,59 @@
+# ============================================
+# PROVEEDOR JSON BASADO EN ORJSON
+# ============================================
+# Sustituye el encoder stdlib de jsonify por orjson (extensión en C),
+# mucho más rápido en los payloads con arrays de floats del dashboard.
+# Si orjson no está instalado, la app sigue usando el proveedor por defecto.
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask que delega en orjson
+
+    Las fechas se pasan al `default` de Flask (OPT_PASSTHROUGH_DATETIME)
+    para conservar exactamente el mismo formato de salida que jsonify.
+    """
+
+    def _options(self, **kwargs):
+        option = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_SERIALIZE_NUMPY
+            | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj,
+            default=kwargs.get('default', self.default),
+            option=self._options(**kwargs)
+        ).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        # orjson no admite object_hook: la sesión de Flask (TaggedJSONSerializer)
+        # lo usa para reconstruir tuplas, bytes, etc.; esas llamadas van al stdlib
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def init_json_provider(app):
+    """Activa OrjsonProvider si orjson está disponible"""
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+        if not app.testing:
+            app.logger.info("✅ orjson activo como proveedor JSON")
+    return app
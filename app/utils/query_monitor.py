@@ -0,0 +1,67 @@
+# ============================================
+# MONITOR DE CONSULTAS POR PETICIÓN (DETECCIÓN DE N+1)
+# ============================================
+# Cuenta las consultas SQL de cada petición y agrupa las que comparten
+# el mismo SQL parametrizado. Si una misma sentencia se repite más de
+# DB_QUERY_N1_THRESHOLD veces, casi siempre es una carga perezosa dentro
+# de un bucle (N+1) y se registra un aviso con la ruta afectada.
+# Se activa con DB_QUERY_LOG_ENABLED (por defecto solo en desarrollo).
+
+import time
+import uuid
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Acumula la sentencia en el contador de la petición actual"""
+    if has_request_context() and hasattr(g, '_query_counter'):
+        g._query_counter[statement] += 1
+
+
+def init_query_monitor(app):
+    """Registra los hooks del monitor si DB_QUERY_LOG_ENABLED está activo"""
+    if not app.config.get('DB_QUERY_LOG_ENABLED', False):
+        return app
+
+    threshold = app.config.get('DB_QUERY_N1_THRESHOLD', 5)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+
+    @app.before_request
+    def start_query_counter():
+        g._query_counter = Counter()
+        g._query_started = time.perf_counter()
+        g._request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:8]
+
+    @app.after_request
+    def report_query_counter(response):
+        counter = g.pop('_query_counter', None)
+        if counter is None:
+            return response
+
+        total = sum(counter.values())
+        elapsed_ms = (time.perf_counter() - g.pop('_query_started')) * 1000
+        response.headers['X-DB-Query-Count'] = str(total)
+
+        app.logger.debug(
+            f"🗄️ [{g._request_id}] {request.method} {request.path}: "
+            f"{total} consultas en {elapsed_ms:.0f} ms"
+        )
+
+        for statement, count in counter.most_common():
+            if count <= threshold:
+                break
+            app.logger.warning(
+                f"⚠️ [{g._request_id}] Posible N+1 en {request.endpoint}: "
+                f"{count}x {' '.join(statement.split())[:200]}"
+            )
+
+        return response
+
+    if not app.testing:
+        app.logger.info(f"✅ Monitor de consultas activo (umbral N+1: {threshold})")
+    return app
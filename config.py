@@ -66,6 +66,10 @@ class Config:
     ALLOW_REGISTRATION = False  # Solo creación manual de usuarios
     REQUIRE_EMAIL_VERIFICATION = False
 
+    # SUBIDAS - Límite del cuerpo de la petición (8 imágenes de 5MB + formulario)
+    # Werkzeug rechaza con 413 antes de parsear nada si se supera
+    MAX_CONTENT_LENGTH = 45 * 1024 * 1024
+
     # ===== CONFIGURACIÓN DE ELIMINACIÓN DE FONDO =====
     # Configuración para el procesamiento automático de imágenes
     REMOVE_BG_ENABLED = False  # Habilitar/deshabilitar funcionalidad globalmente
@@ -83,10 +87,16 @@ class Config:
     REMOVE_BG_KEEP_BACKUPS = 1  # Número de backups recientes a mantener
     REMOVE_BG_BACKUP_ORIGINAL = True  # Crear backup antes de procesar
 
+    # ===== MONITOR DE CONSULTAS (N+1) =====
+    # Cuenta consultas por petición y avisa cuando una sentencia se repite
+    DB_QUERY_LOG_ENABLED = os.environ.get('DB_QUERY_LOG_ENABLED', 'false').lower() == 'true'
+    DB_QUERY_N1_THRESHOLD = 5  # Repeticiones de la misma sentencia antes de avisar
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
+    DB_QUERY_LOG_ENABLED = True
 
 
 class ProductionConfig(Config):
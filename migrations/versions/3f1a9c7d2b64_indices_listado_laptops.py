@@ -0,0 +1,54 @@
+"""Indices para el listado de laptops
+
+Revision ID: 3f1a9c7d2b64
+Revises: e006d822bd38
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c7d2b64'
+down_revision = 'e006d822bd38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        # Filtros del listado + orden por fecha; INCLUDE permite index-only scans
+        op.create_index(
+            'idx_laptop_list', 'laptops',
+            ['store_id', 'brand_id', 'category', 'entry_date'],
+            postgresql_include=['sale_price', 'quantity', 'sku', 'condition', 'min_alert'],
+            postgresql_concurrently=True
+        )
+        # Rango de precios (min/max) del filtro
+        op.create_index(
+            'idx_laptop_sale_price', 'laptops', ['sale_price'],
+            postgresql_concurrently=True
+        )
+        # Paginación por cursor (entry_date, id)
+        op.create_index(
+            'idx_laptop_entry_date_id', 'laptops', ['entry_date', 'id'],
+            postgresql_concurrently=True
+        )
+        # (entry_date, id) ya cubre las búsquedas por entry_date: el índice de una
+        # sola columna solo encarece las escrituras. idx_laptop_entry_date existe
+        # en bases creadas con create_all()
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_laptops_entry_date')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_laptop_entry_date')
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_laptops_entry_date', 'laptops', ['entry_date'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_laptop_entry_date_id', table_name='laptops', postgresql_concurrently=True)
+        op.drop_index('idx_laptop_sale_price', table_name='laptops', postgresql_concurrently=True)
+        op.drop_index('idx_laptop_list', table_name='laptops', postgresql_concurrently=True)
@@ -0,0 +1,43 @@
+"""Índice parcial de stock bajo y trigramas sobre sku
+
+Revision ID: 5c7e1b9d4a20
+Revises: 3f1a9c7d2b64
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c7e1b9d4a20'
+down_revision = '3f1a9c7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # gin_trgm_ops requiere la extensión pg_trgm
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        # Solo las filas con stock bajo (mismo predicado que Laptop.is_low_stock)
+        op.create_index(
+            'idx_laptop_low_stock', 'laptops', ['id'],
+            postgresql_where=sa.text('quantity - reserved_quantity <= min_alert'),
+            postgresql_concurrently=True
+        )
+        # Búsqueda ILIKE '%texto%' sobre el SKU
+        op.create_index(
+            'idx_laptop_sku_trgm', 'laptops', ['sku'],
+            postgresql_using='gin',
+            postgresql_ops={'sku': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_laptop_sku_trgm', table_name='laptops', postgresql_concurrently=True)
+        op.drop_index('idx_laptop_low_stock', table_name='laptops', postgresql_concurrently=True)
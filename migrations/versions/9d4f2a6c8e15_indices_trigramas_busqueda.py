@@ -0,0 +1,42 @@
+"""Índices de trigramas para la búsqueda del listado de laptops
+
+Revision ID: 9d4f2a6c8e15
+Revises: 5c7e1b9d4a20
+Create Date: 2026-10-17 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f2a6c8e15'
+down_revision = '5c7e1b9d4a20'
+branch_labels = None
+depends_on = None
+
+# Columnas que filtra la búsqueda ILIKE '%texto%' (sku ya tiene su índice)
+SEARCH_COLUMNS = ('display_name', 'slug', 'short_description')
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.create_index(
+                f'idx_laptop_{column}_trgm', 'laptops', [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for column in reversed(SEARCH_COLUMNS):
+            op.drop_index(
+                f'idx_laptop_{column}_trgm', table_name='laptops',
+                postgresql_concurrently=True
+            )
@@ -0,0 +1,44 @@
+"""Índices por faceta para el listado de laptops ordenado por fecha
+
+Revision ID: a2c8e5f1b7d3
+Revises: 9d4f2a6c8e15
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c8e5f1b7d3'
+down_revision = '9d4f2a6c8e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        # Filtro por tienda / marca + orden (entry_date, id): la página sale
+        # de un recorrido del índice sin ordenar en memoria
+        op.create_index(
+            'idx_laptop_store_entry', 'laptops', ['store_id', 'entry_date', 'id'],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_laptop_brand_entry', 'laptops', ['brand_id', 'entry_date', 'id'],
+            postgresql_concurrently=True
+        )
+        # Solo publicadas (filtro is_published=1 y catálogo público)
+        op.create_index(
+            'idx_laptop_published_entry', 'laptops', ['entry_date', 'id'],
+            postgresql_where=sa.text('is_published'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_laptop_published_entry', table_name='laptops', postgresql_concurrently=True)
+        op.drop_index('idx_laptop_brand_entry', table_name='laptops', postgresql_concurrently=True)
+        op.drop_index('idx_laptop_store_entry', table_name='laptops', postgresql_concurrently=True)
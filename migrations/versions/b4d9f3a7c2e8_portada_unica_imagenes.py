@@ -0,0 +1,51 @@
+"""Una sola portada por laptop e índice de orden de imágenes
+
+Revision ID: b4d9f3a7c2e8
+Revises: a2c8e5f1b7d3
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d9f3a7c2e8'
+down_revision = 'a2c8e5f1b7d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Normalizar datos existentes: conservar solo la primera portada por laptop
+    op.execute("""
+        UPDATE laptop_images li
+        SET is_cover = FALSE
+        WHERE li.is_cover
+          AND EXISTS (
+              SELECT 1 FROM laptop_images other
+              WHERE other.laptop_id = li.laptop_id
+                AND other.is_cover
+                AND (other.ordering, other.id) < (li.ordering, li.id)
+          )
+    """)
+
+    # Exclusión en lugar de índice único parcial: al ser DEFERRABLE se valida
+    # al final de cada sentencia, así el UPDATE que mueve la portada de una
+    # imagen a otra no choca consigo mismo a mitad de camino
+    op.execute("""
+        ALTER TABLE laptop_images
+        ADD CONSTRAINT ux_laptop_image_cover
+        EXCLUDE USING btree (laptop_id WITH =) WHERE (is_cover)
+        DEFERRABLE INITIALLY IMMEDIATE
+    """)
+
+    # Galería ordenada por laptop
+    op.create_index(
+        'idx_laptop_image_laptop_ordering', 'laptop_images', ['laptop_id', 'ordering']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_laptop_image_laptop_ordering', table_name='laptop_images')
+    op.execute('ALTER TABLE laptop_images DROP CONSTRAINT ux_laptop_image_cover')
@@ -0,0 +1,41 @@
+"""Índices por componente para los filtros restantes del listado de laptops
+
+Revision ID: c7e2a9d4f6b1
+Revises: b4d9f3a7c2e8
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9d4f6b1'
+down_revision = 'b4d9f3a7c2e8'
+branch_labels = None
+depends_on = None
+
+
+# Filtros de laptops_list (?processor, ?gpu, ?screen, ?supplier) que aún
+# no tenían índice: misma forma (faceta, entry_date, id) que las de tienda/marca
+FACET_INDEXES = (
+    ('idx_laptop_processor_entry', 'processor_id'),
+    ('idx_laptop_gpu_entry', 'graphics_card_id'),
+    ('idx_laptop_screen_entry', 'screen_id'),
+    ('idx_laptop_supplier_entry', 'supplier_id'),
+)
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, column in FACET_INDEXES:
+            op.create_index(
+                name, 'laptops', [column, 'entry_date', 'id'],
+                postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(FACET_INDEXES):
+            op.drop_index(name, table_name='laptops', postgresql_concurrently=True)
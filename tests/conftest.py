@@ -0,0 +1,91 @@
+# ============================================
+# FIXTURES COMUNES DE PRUEBAS
+# ============================================
+# App con TestingConfig (SQLite en memoria), sin login y con los
+# catálogos mínimos que exige el modelo Laptop.
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import create_app, db
+from app.models.user import User
+from app.models.laptop import (
+    Laptop, Brand, LaptopModel, Processor, OperatingSystem, Screen,
+    GraphicsCard, Storage, Ram, Store
+)
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config.update(LOGIN_DISABLED=True, SQLALCHEMY_ECHO=False)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='tester', email='tester@example.com', password_hash='x', is_admin=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_client(app, user):
+    """Cliente con sesión iniciada (para vistas que usan current_user)"""
+    app.config['LOGIN_DISABLED'] = False
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def catalogs(app):
+    """IDs de un registro por cada catálogo obligatorio de Laptop"""
+    ids = {}
+    for field, model in (
+        ('brand_id', Brand), ('model_id', LaptopModel), ('processor_id', Processor),
+        ('os_id', OperatingSystem), ('screen_id', Screen), ('graphics_card_id', GraphicsCard),
+        ('storage_id', Storage), ('ram_id', Ram), ('store_id', Store)
+    ):
+        obj = model(name=f'{field} 1')
+        db.session.add(obj)
+        db.session.flush()
+        ids[field] = obj.id
+    db.session.commit()
+    return ids
+
+
+@pytest.fixture
+def make_laptop(catalogs):
+    """Crea y confirma una laptop numerada; los kwargs sobrescriben los valores"""
+    def _make(number, **overrides):
+        data = dict(
+            sku=f'LX-20260101-{number:04d}',
+            slug=f'laptop-{number}',
+            display_name=f'Laptop {number}',
+            purchase_cost=Decimal('100.00'),
+            sale_price=Decimal('200.00'),
+            entry_date=date.today() - timedelta(days=number),
+            **catalogs
+        )
+        data.update(overrides)
+        laptop = Laptop(**data)
+        db.session.add(laptop)
+        db.session.commit()
+        return laptop
+    return _make
@@ -0,0 +1,22 @@
+# ============================================
+# PRUEBAS DE DUPLICAR LAPTOP
+# ============================================
+
+from app import db
+from app.models.laptop import Laptop
+
+
+def test_duplicate_creates_one_unpublished_copy(auth_client, make_laptop):
+    original = make_laptop(1, is_published=True, quantity=7, internal_notes='Rayón en la tapa')
+
+    response = auth_client.post(f'/inventory/{original.id}/duplicate')
+    assert response.status_code == 302
+
+    copy = Laptop.query.filter(Laptop.id != original.id).one()
+    assert copy.sku != original.sku
+    assert copy.slug == 'laptop-1-copia'
+    assert copy.display_name == 'Laptop 1 (Copia)'
+    assert copy.is_published is False
+    assert copy.quantity == 1
+    assert copy.internal_notes is None
+    assert response.headers['Location'].endswith(f'/inventory/{copy.id}/edit')
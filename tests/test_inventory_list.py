@@ -0,0 +1,31 @@
+# ============================================
+# PRUEBAS DEL LISTADO DE INVENTARIO
+# ============================================
+
+JSON = {'Accept': 'application/json'}
+
+
+def list_skus(client, query):
+    response = client.get(f'/inventory/?{query}', headers=JSON)
+    assert response.status_code == 200
+    return {item['sku'] for item in response.get_json()['data']}
+
+
+def test_boolean_filters_bind_their_own_values(client, make_laptop):
+    """Dos filtros booleanos con valores distintos no comparten parámetro"""
+    published = make_laptop(1, is_published=True, is_featured=False)
+    make_laptop(2, is_published=False, is_featured=False)
+    make_laptop(3, is_published=True, is_featured=True, npu=True)
+
+    assert list_skus(client, 'is_published=1&is_featured=0') == {published.sku}
+    assert list_skus(client, 'is_published=1&has_npu=0') == {published.sku}
+
+
+def test_per_page_is_clamped(client, make_laptop):
+    """per_page negativo o enorme no llega al LIMIT (PostgreSQL rechaza LIMIT < 0)"""
+    for number in range(1, 4):
+        make_laptop(number)
+
+    assert len(list_skus(client, 'per_page=-5')) == 1
+    assert len(list_skus(client, 'per_page=0')) == 1
+    assert len(list_skus(client, 'per_page=100000')) == 3
@@ -0,0 +1,67 @@
+# ============================================
+# PRUEBAS DE AYUDANTES DE SUBIDA DE IMÁGENES
+# ============================================
+
+import hashlib
+import io
+import os
+from tempfile import SpooledTemporaryFile
+
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app.models.laptop import LaptopImage
+from app.routes import inventory
+from app.routes.inventory import UPLOAD_CHUNK_SIZE, save_upload, upload_size
+
+
+def test_upload_size_keeps_small_uploads_in_memory():
+    """El tamaño se mide sin mover el puntero ni volcar el archivo a disco"""
+    stream = SpooledTemporaryFile(max_size=500 * 1024, mode='rb+')
+    stream.write(b'x' * 1000)
+    stream.seek(10)
+
+    assert upload_size(FileStorage(stream=stream, filename='foto.png')) == 1000
+    assert stream.tell() == 10
+    assert not stream._rolled
+
+
+def test_save_upload_streams_in_blocks_without_leftovers(tmp_path):
+    """El archivo se copia por bloques, lleva el hash en el nombre y no deja temporales"""
+    data = os.urandom(UPLOAD_CHUNK_SIZE * 2 + 123)
+    upload = FileStorage(stream=io.BytesIO(data), filename='foto.png')
+
+    filename, filepath = save_upload(upload, str(tmp_path), 'LX-1', 'png')
+
+    assert filename.startswith(f"LX-1_{hashlib.sha256(data).hexdigest()[:16]}_")
+    assert open(filepath, 'rb').read() == data
+    assert os.listdir(tmp_path) == [filename]
+
+
+def test_save_upload_gives_identical_uploads_distinct_files(tmp_path):
+    """Dos subidas iguales no comparten archivo"""
+    paths = [
+        save_upload(FileStorage(stream=io.BytesIO(b'same'), filename='foto.png'), str(tmp_path), 'LX-1', 'png')[1]
+        for _ in range(2)
+    ]
+
+    assert paths[0] != paths[1]
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths)
+
+
+def test_background_removal_skips_shared_files(app, make_laptop, monkeypatch):
+    """Un archivo compartido por varias imágenes no se reescribe"""
+    laptop = make_laptop(1)
+    images = [
+        LaptopImage(laptop_id=laptop.id, image_path='uploads/laptops/1/compartida.png', ordering=i, position=i)
+        for i in (1, 2)
+    ]
+    db.session.add_all(images)
+    db.session.commit()
+    jobs = [(image.id, '/tmp/compartida.png', False, image.position) for image in images]
+
+    processed = []
+    monkeypatch.setattr(inventory, '_process_background_removal', lambda *args, **kwargs: processed.append(args))
+    inventory._run_background_removal_jobs(app, laptop.id, jobs)
+
+    assert processed == []
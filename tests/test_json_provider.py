@@ -0,0 +1,17 @@
+# ============================================
+# PRUEBAS DEL PROVEEDOR JSON (ORJSON)
+# ============================================
+
+
+def test_flash_survives_redirect_and_renders(auth_client, make_laptop):
+    """Los flash (tuplas etiquetadas en la cookie de sesión) se leen y se renderizan"""
+    original = make_laptop(1)
+
+    response = auth_client.post(f'/inventory/{original.id}/duplicate', follow_redirects=True)
+    assert response.status_code == 200
+    assert 'Laptop duplicada correctamente' in response.get_data(as_text=True)
+
+
+def test_app_json_round_trip(app):
+    payload = {'ids': [1, 2], 'name': 'Laptop'}
+    assert app.json.loads(app.json.dumps(payload)) == payload
@@ -0,0 +1,21 @@
+# ============================================
+# PRUEBAS DE MODELOS
+# ============================================
+
+from app import db
+from app.models.laptop import Laptop
+
+
+def test_updated_at_is_set_by_orm_and_bulk_updates(make_laptop):
+    """onupdate de updated_at compila también en SQLite (TestingConfig)"""
+    laptop = make_laptop(1)
+    created_updated_at = laptop.updated_at
+
+    laptop.sale_price = 250
+    db.session.commit()
+    assert laptop.updated_at is not None
+    assert laptop.updated_at >= created_updated_at
+
+    Laptop.query.filter_by(id=laptop.id).update({'quantity': 3})
+    db.session.commit()
+    assert db.session.get(Laptop, laptop.id).quantity == 3